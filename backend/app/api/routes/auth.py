@@ -3,11 +3,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
 from ...core.config import settings
-from ...core.security import create_access_token
+from ...core.security import create_access_token, get_password_pool_stats
 from ...models.user import User, UserCreate
 from ...schemas.token import Token
 from ...services.user_service import authenticate_user, create_user
-from ..deps import get_current_active_user
+from ..deps import get_current_active_user, get_current_admin_user
 
 router = APIRouter()
 
@@ -40,3 +40,10 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: User = Depends(get_current_active_user)):
     return current_user
+
+@router.get("/password-pool/stats")
+async def read_password_pool_stats(current_user: User = Depends(get_current_admin_user)):
+    """
+    État du pool de hachage des mots de passe (taille de la file, rejets).
+    """
+    return get_password_pool_stats()
@@ -1,5 +1,10 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from ...core.pagination import NEXT_CURSOR_HEADER
+from ...core.config import settings
+from ...core.http_cache import conditional_response
+from ...core.response_cache import cached_response
+from ...db.database import get_database
 from ...models.blog import BlogPostCreate, BlogPostInDB, BlogPostUpdate, BlogPostWithAuthor
 from ...services.blog_service import (
     get_all_blog_posts, 
@@ -9,6 +14,7 @@ from ...services.blog_service import (
     delete_blog_post,
     get_blog_categories
 )
+from ...services.user_service import get_user_updated_at
 from ...api.deps import get_current_user, get_optional_current_user
 from ...models.user import UserInDB
 from typing import Dict, Any
@@ -17,31 +23,57 @@ router = APIRouter()
 
 @router.get("/", response_model=List[BlogPostWithAuthor])
 async def read_blog_posts(
-    skip: int = 0, 
-    limit: int = 10,
-    category: Optional[str] = None
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    category: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
     """
     Récupérer tous les articles de blog avec pagination et filtrage par catégorie.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor ;
+    skip n'est conservé que pour la compatibilité.
     """
-    return await get_all_blog_posts(skip=skip, limit=limit, category=category)
+    headers = {}
+    
+    async def build():
+        posts, next_cursor = await get_all_blog_posts(
+            skip=skip, limit=limit, category=category, cursor=cursor,
+            as_document=settings.FAST_JSON_RESPONSES
+        )
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return posts
+    
+    return await cached_response(request, ["blog"], build, headers)
 
 @router.get("/categories", response_model=List[str])
-async def read_blog_categories():
+async def read_blog_categories(request: Request):
     """
     Récupérer toutes les catégories d'articles.
     """
-    return await get_blog_categories()
+    return await cached_response(request, ["blog"], get_blog_categories)
 
 @router.get("/{slug}", response_model=BlogPostWithAuthor)
-async def read_blog_post(slug: str):
+async def read_blog_post(slug: str, request: Request):
     """
     Récupérer un article de blog par son slug.
     """
-    post = await get_blog_post_by_slug(slug)
-    if not post:
-        raise HTTPException(status_code=404, detail="Article non trouvé")
-    return post
+    async def build():
+        post = await get_blog_post_by_slug(slug, as_document=settings.FAST_JSON_RESPONSES)
+        if not post:
+            raise HTTPException(status_code=404, detail="Article non trouvé")
+        return post
+    
+    db = await get_database()
+    # La réponse inclut l'auteur : sa modification change aussi le validateur
+    async def author_updated_at(post):
+        return await get_user_updated_at(post.get("author_id"))
+
+    return await conditional_response(
+        request, db.blog_posts, {"slug": slug}, settings.BLOG_POST_CACHE_CONTROL,
+        ["blog"], build, fields=["author_id"], related_updated_at=author_updated_at
+    )
 
 @router.post("/", response_model=BlogPostInDB)
 async def create_post(
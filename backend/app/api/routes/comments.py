@@ -1,10 +1,13 @@
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from fastapi.responses import JSONResponse
 
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
 from app.models.comment import Comment, CommentCreate, CommentUpdate
 from app.services.comment_service import (
     get_comments_by_post_id,
+    get_comment_replies,
     get_comment_by_id,
     create_comment,
     update_comment,
@@ -16,9 +19,34 @@ from app.api.deps import get_current_user, get_optional_current_user
 router = APIRouter()
 
 @router.get("/post/{post_id}", response_model=List[Comment])
-async def read_comments(post_id: str):
-    """Récupère tous les commentaires d'un article."""
-    return await get_comments_by_post_id(post_id)
+async def read_comments(
+    post_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    depth: int = Query(1, ge=0, le=settings.COMMENTS_MAX_DEPTH)
+):
+    """
+    Récupère une page de commentaires d'un article avec leurs réponses jusqu'à
+    `depth` niveaux. Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
+    comments, next_cursor = await get_comments_by_post_id(post_id, limit, cursor, depth)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return comments
+
+@router.get("/{comment_id}/replies", response_model=List[Comment])
+async def read_comment_replies(
+    comment_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """Récupère une page de réponses directes à un commentaire."""
+    replies, next_cursor = await get_comment_replies(comment_id, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return replies
 
 @router.get("/{comment_id}", response_model=Comment)
 async def read_comment(comment_id: str):
@@ -36,7 +64,7 @@ async def create_comment_endpoint(
     """Crée un nouveau commentaire."""
     try:
         # Assurez-vous que l'ID de l'auteur correspond à l'utilisateur connecté
-        if comment.author_id != current_user.id:
+        if comment.author_id != str(current_user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="L'ID de l'auteur ne correspond pas à l'utilisateur connecté"
@@ -55,7 +83,7 @@ async def update_comment_endpoint(
     current_user = Depends(get_current_user)
 ):
     """Met à jour un commentaire existant."""
-    updated_comment = await update_comment(comment_id, comment_update, current_user.id)
+    updated_comment = await update_comment(comment_id, comment_update, str(current_user.id))
     if updated_comment is None:
         raise HTTPException(status_code=404, detail="Commentaire non trouvé")
     return updated_comment
@@ -67,7 +95,7 @@ async def delete_comment_endpoint(
 ):
     """Supprime un commentaire."""
     is_admin = getattr(current_user, "is_admin", False)
-    success = await delete_comment(comment_id, current_user.id, is_admin)
+    success = await delete_comment(comment_id, str(current_user.id), is_admin)
     if not success:
         raise HTTPException(status_code=404, detail="Commentaire non trouvé")
     return {"message": "Commentaire supprimé avec succès"}
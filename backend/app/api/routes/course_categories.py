@@ -1,5 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from app.core.pagination import NEXT_CURSOR_HEADER, fetch_page
+from app.core.response_cache import cached_response, invalidate_cache_tags
+from app.services.autocomplete_service import COURSE_CATEGORY, index_course_category, unindex
 from app.models.course_category import CourseCategoryCreate, CourseCategoryUpdate, CourseCategoryInDB
 from app.api.deps import get_current_admin_user
 from app.models.user import User
@@ -29,21 +32,36 @@ async def create_category(
     category_dict["course_count"] = 0
     
     result = await db.course_categories.insert_one(category_dict)
+    await invalidate_cache_tags("course_categories")
     created_category = await db.course_categories.find_one({"_id": result.inserted_id})
+    await index_course_category(created_category)
     return CourseCategoryInDB(**created_category)
 
 @router.get("/", response_model=List[CourseCategoryInDB])
 async def read_categories(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    active_only: bool = False
+    active_only: bool = False,
+    cursor: Optional[str] = None
 ):
-    """Récupérer la liste des catégories de formation"""
-    db = await get_database()
+    """
+    Récupérer la liste des catégories de formation.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
     query = {"is_active": True} if active_only else {}
-    cursor = db.course_categories.find(query).skip(skip).limit(limit)
-    categories = await cursor.to_list(length=limit)
-    return [CourseCategoryInDB(**category) for category in categories]
+    headers = {}
+    
+    async def build():
+        db = await get_database()
+        categories, next_cursor = await fetch_page(
+            db.course_categories, query, limit, cursor, sort_field="_id", skip=skip
+        )
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [CourseCategoryInDB(**category) for category in categories]
+    
+    return await cached_response(request, ["course_categories"], build, headers)
 
 @router.get("/{category_id}", response_model=CourseCategoryInDB)
 async def read_category(category_id: str):
@@ -92,8 +110,11 @@ async def update_category(
             {"_id": ObjectId(category_id)},
             {"$set": update_data}
         )
+        await invalidate_cache_tags("course_categories")
     
     updated_category = await db.course_categories.find_one({"_id": ObjectId(category_id)})
+    if {"name", "slug", "is_active"} & update_data.keys():
+        await index_course_category(updated_category)
     return CourseCategoryInDB(**updated_category)
 
 @router.delete("/{category_id}")
@@ -106,4 +127,6 @@ async def delete_category(
     result = await db.course_categories.delete_one({"_id": ObjectId(category_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Catégorie non trouvée")
+    await invalidate_cache_tags("course_categories")
+    await unindex(COURSE_CATEGORY, category_id)
     return {"message": "Catégorie supprimée avec succès"} 
\ No newline at end of file
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
+from ...core.pagination import NEXT_CURSOR_HEADER, fetch_page
 from ...db.mongodb import get_database
 from ...models.course_progress import UserCourseProgressCreate, UserCourseProgressUpdate, UserCourseProgressInDB
-from ...core.auth import get_current_user
-from ...models.user import UserInDB
-from ...models.course import CourseInDB
+from ...core.auth import get_current_principal
+from ...schemas.token import Principal
+from ...services.user_service import invalidate_user_cache
 
 router = APIRouter()
 
 @router.post("/", response_model=UserCourseProgressInDB)
 async def create_course_progress(
     progress: UserCourseProgressCreate,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Crée un nouvel enregistrement de progression pour un utilisateur qui commence une formation.
@@ -47,6 +50,7 @@ async def create_course_progress(
         {"_id": current_user.id},
         {"$addToSet": {"enrolled_courses": str(progress.course_id)}}
     )
+    invalidate_user_cache(current_user.id)
     
     result = await db.user_course_progress.insert_one(progress_dict)
     created_progress = await db.user_course_progress.find_one({"_id": result.inserted_id})
@@ -55,19 +59,27 @@ async def create_course_progress(
 
 @router.get("/user/current", response_model=List[UserCourseProgressInDB])
 async def get_user_course_progress(
-    current_user: UserInDB = Depends(get_current_user)
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
-    Récupère la progression de l'utilisateur connecté pour tous ses cours.
+    Récupère la progression de l'utilisateur connecté pour ses cours, par pages.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
     """
     db = await get_database()
-    progress_list = await db.user_course_progress.find({"user_id": current_user.id}).to_list(length=100)
+    progress_list, next_cursor = await fetch_page(
+        db.user_course_progress, {"user_id": current_user.id}, limit, cursor, sort_field="_id"
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [UserCourseProgressInDB(**progress) for progress in progress_list]
 
 @router.get("/course/{course_id}/user/current", response_model=UserCourseProgressInDB)
 async def get_course_progress_for_current_user(
     course_id: str,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Récupère la progression de l'utilisateur connecté pour un cours spécifique.
@@ -87,7 +99,7 @@ async def get_course_progress_for_current_user(
 async def update_course_progress(
     progress_id: str,
     progress_update: UserCourseProgressUpdate,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Met à jour la progression d'un utilisateur pour un cours.
@@ -119,61 +131,70 @@ async def update_course_progress(
 async def complete_lesson(
     lesson_id: str,
     course_id: str,
-    current_user: UserInDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Marque une leçon comme complétée et met à jour la progression globale.
+    La progression est créée si besoin et recalculée en une seule opération atomique.
     """
-    db = await get_database()
-    
-    # Récupérer la progression actuelle
-    progress = await db.user_course_progress.find_one({
-        "user_id": current_user.id,
-        "course_id": ObjectId(course_id)
-    })
+    if not ObjectId.is_valid(lesson_id) or not ObjectId.is_valid(course_id):
+        raise HTTPException(status_code=400, detail="ID de cours ou de leçon invalide")
     
-    if not progress:
-        # Si l'utilisateur n'a pas encore de progression pour ce cours, en créer une
-        new_progress = UserCourseProgressCreate(
-            user_id=current_user.id,
-            course_id=ObjectId(course_id),
-            completed_lessons=[ObjectId(lesson_id)],
-            last_lesson_id=ObjectId(lesson_id)
-        )
-        return await create_course_progress(new_progress, current_user)
+    db = await get_database()
     
-    # Récupérer le cours pour calculer la progression
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    # Vérifier que la leçon appartient au cours (index modules.lessons.id)
+    # et récupérer le nombre total de leçons maintenu sur le cours
+    course = await db.courses.find_one(
+        {"_id": ObjectId(course_id), "modules.lessons.id": lesson_id},
+        {"total_lessons": 1}
+    )
     if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-    
-    # Calculer le nombre total de leçons dans le cours
-    total_lessons = sum(len(module.get("lessons", [])) for module in course.get("modules", []))
-    
-    # Ajouter la leçon à la liste des leçons complétées si elle n'y est pas déjà
-    completed_lessons = progress.get("completed_lessons", [])
-    if ObjectId(lesson_id) not in completed_lessons:
-        completed_lessons.append(ObjectId(lesson_id))
-    
-    # Calculer le pourcentage de progression
-    progress_percentage = (len(completed_lessons) / total_lessons * 100) if total_lessons > 0 else 0
-    
-    # Vérifier si le cours est complété
-    is_completed = len(completed_lessons) >= total_lessons
+        raise HTTPException(status_code=404, detail="Leçon non trouvée dans ce cours")
+    total_lessons = course.get("total_lessons", 0)
+    
+    lesson_object_id = ObjectId(lesson_id)
+    now = datetime.utcnow()
+    completed_lessons = {"$ifNull": ["$completed_lessons", []]}
+    completed_count = {"$size": "$completed_lessons"}
+    pipeline = [
+        {"$set": {
+            # Équivalent de $addToSet en conservant l'ordre de complétion
+            "completed_lessons": {"$cond": [
+                {"$in": [lesson_object_id, completed_lessons]},
+                completed_lessons,
+                {"$concatArrays": [completed_lessons, [lesson_object_id]]}
+            ]},
+            "last_lesson_id": lesson_object_id,
+            "last_accessed_at": now,
+            "started_at": {"$ifNull": ["$started_at", now]},
+        }},
+        {"$set": {
+            "progress_percentage": {"$cond": [
+                {"$gt": [total_lessons, 0]},
+                {"$multiply": [{"$divide": [completed_count, total_lessons]}, 100]},
+                0
+            ]},
+            "is_completed": {"$gte": [completed_count, total_lessons]},
+        }},
+    ]
+    
+    progress_filter = {"user_id": current_user.id, "course_id": ObjectId(course_id)}
+    try:
+        progress = await db.user_course_progress.find_one_and_update(
+            progress_filter, pipeline, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Deux premières complétions simultanées : l'autre requête a créé la progression
+        progress = await db.user_course_progress.find_one_and_update(
+            progress_filter, pipeline, return_document=ReturnDocument.AFTER
+        )
     
-    # Mettre à jour la progression
-    await db.user_course_progress.update_one(
-        {"_id": progress["_id"]},
-        {
-            "$set": {
-                "completed_lessons": completed_lessons,
-                "last_lesson_id": ObjectId(lesson_id),
-                "last_accessed_at": datetime.utcnow(),
-                "progress_percentage": progress_percentage,
-                "is_completed": is_completed
-            }
-        }
-    )
+    if progress["completed_lessons"] == [lesson_object_id]:
+        # Première leçon complétée : inscrire l'utilisateur au cours s'il ne l'est pas déjà
+        await db.users.update_one(
+            {"_id": current_user.id},
+            {"$addToSet": {"enrolled_courses": course_id}}
+        )
+        invalidate_user_cache(current_user.id)
     
-    updated_progress = await db.user_course_progress.find_one({"_id": progress["_id"]})
-    return UserCourseProgressInDB(**updated_progress)
+    return UserCourseProgressInDB(**progress)
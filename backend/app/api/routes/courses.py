@@ -1,14 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from ...core.pagination import NEXT_CURSOR_HEADER, next_page, page_query
+from ...core.config import settings
+from ...core.http_cache import conditional_response
+from ...core.response_cache import cached_response, invalidate_cache_tags
+from ...core.responses import ORJSONDocumentResponse, document_or_model, model_projection
 from ...db.mongodb import get_database
-from ...models.course import CourseCreate, CourseUpdate, CourseInDB, Module, Lesson
+from ...models.course import CourseCreate, CourseUpdate, CourseInDB, CourseSummary, Module, ModuleUpdate, Lesson, LessonUpdate
 from ...core.auth import get_current_admin_user, get_current_user
 from ...models.user import UserInDB
+from ...services.autocomplete_service import COURSE, index_course, unindex
+from ...services.course_service import (
+    COURSE_SUMMARY_PROJECTION,
+    TOTAL_LESSONS_EXPR,
+    count_lessons,
+    get_lesson,
+    update_lesson as update_lesson_by_id
+)
 
 router = APIRouter()
 
+# Projection des routes de détail : uniquement les champs de CourseInDB
+COURSE_PROJECTION = model_projection(CourseInDB)
+
 # Routes pour les formations
 @router.post("/", response_model=CourseInDB)
 async def create_course(
@@ -29,22 +46,30 @@ async def create_course(
     course.duration = total_duration
 
     course_dict = course.dict(by_alias=True)
+    course_dict["total_lessons"] = count_lessons(course_dict["modules"])
     course_dict["created_at"] = datetime.utcnow()
     course_dict["updated_at"] = datetime.utcnow()
     
     result = await db.courses.insert_one(course_dict)
+    await invalidate_cache_tags("courses")
     created_course = await db.courses.find_one({"_id": result.inserted_id})
+    await index_course(created_course)
     return CourseInDB(**created_course)
 
-@router.get("/", response_model=List[CourseInDB])
+@router.get("/", response_model=List[CourseSummary])
 async def get_courses(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     category_id: Optional[str] = None,
     featured: Optional[bool] = None,
-    is_active: Optional[bool] = None
+    is_active: Optional[bool] = None,
+    cursor: Optional[str] = None
 ):
-    db = await get_database()
+    """
+    Liste paginée des formations. Le curseur de la page suivante est renvoyé
+    dans l'en-tête X-Next-Cursor ; skip n'est conservé que pour la compatibilité.
+    """
     query = {}
     
     if category_id:
@@ -54,24 +79,51 @@ async def get_courses(
     if is_active is not None:
         query["is_active"] = is_active
 
-    courses = await db.courses.find(query).skip(skip).limit(limit).to_list(length=limit)
-    return [CourseInDB(**course) for course in courses]
+    headers = {}
+
+    async def build():
+        db = await get_database()
+        match, sort = page_query(query, cursor, sort_field="_id")
+        pipeline = [{"$match": match}, {"$sort": dict(sort)}]
+        if skip and not cursor:
+            pipeline.append({"$skip": skip})
+        # Un document de plus que demandé pour savoir s'il existe une page suivante
+        pipeline += [
+            {"$limit": limit + 1},
+            {"$project": COURSE_SUMMARY_PROJECTION},
+        ]
+        courses = await db.courses.aggregate(pipeline).to_list(length=limit + 1)
+        courses, next_cursor = next_page(courses, limit, sort_field="_id")
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [document_or_model(course, CourseSummary) for course in courses]
+
+    return await cached_response(request, ["courses"], build, headers)
 
 @router.get("/{course_id}", response_model=CourseInDB)
 async def get_course(course_id: str):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    course = await db.courses.find_one({"_id": ObjectId(course_id)}, COURSE_PROJECTION)
     if not course:
         raise HTTPException(status_code=404, detail="Cours non trouvé")
+    if settings.FAST_JSON_RESPONSES:
+        return ORJSONDocumentResponse(course)
     return CourseInDB(**course)
 
 @router.get("/slug/{slug}", response_model=CourseInDB)
-async def get_course_by_slug(slug: str):
+async def get_course_by_slug(slug: str, request: Request):
     db = await get_database()
-    course = await db.courses.find_one({"slug": slug})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-    return CourseInDB(**course)
+
+    async def build():
+        course = await db.courses.find_one({"slug": slug}, COURSE_PROJECTION)
+        if not course:
+            raise HTTPException(status_code=404, detail="Cours non trouvé")
+        return document_or_model(course, CourseInDB)
+
+    return await conditional_response(
+        request, db.courses, {"slug": slug}, settings.COURSE_DETAIL_CACHE_CONTROL,
+        ["courses"], build
+    )
 
 @router.put("/{course_id}", response_model=CourseInDB)
 async def update_course(
@@ -86,6 +138,8 @@ async def update_course(
 
     update_data = course_update.dict(exclude_unset=True)
     if update_data:
+        if update_data.get("modules") is not None:
+            update_data["total_lessons"] = count_lessons(update_data["modules"])
         update_data["updated_at"] = datetime.utcnow()
         await db.courses.update_one(
             {"_id": ObjectId(course_id)},
@@ -93,6 +147,9 @@ async def update_course(
         )
     
     updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    await invalidate_cache_tags("courses")
+    if {"title", "slug", "is_active"} & update_data.keys():
+        await index_course(updated_course)
     return CourseInDB(**updated_course)
 
 @router.delete("/{course_id}")
@@ -104,9 +161,60 @@ async def delete_course(
     result = await db.courses.delete_one({"_id": ObjectId(course_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Cours non trouvé")
+    await invalidate_cache_tags("courses")
+    await unindex(COURSE, course_id)
     return {"message": "Cours supprimé avec succès"}
 
 # Routes pour les modules
+#
+# Chaque mutation est un unique find_one_and_update : la présence du module ou
+# de la leçon est vérifiée dans le filtre et le cours modifié est renvoyé directement.
+
+def _without_index(array_expr, index: int) -> dict:
+    """Expression d'agrégation : le tableau privé de l'élément à la position donnée."""
+    return {"$map": {
+        "input": {"$filter": {
+            "input": {"$range": [0, {"$size": array_expr}]},
+            "cond": {"$ne": ["$$this", index]}
+        }},
+        "in": {"$arrayElemAt": [array_expr, "$$this"]}
+    }}
+
+def _append(array_expr, item: dict, set_order: bool) -> dict:
+    """
+    Expression d'agrégation : le tableau complété par l'élément donné.
+    Si set_order est vrai, l'ordre de l'élément vaut la nouvelle taille du tableau.
+    """
+    array_expr = {"$ifNull": [array_expr, []]}
+    new_item = {"$literal": item}
+    if set_order:
+        new_item = {"$mergeObjects": [new_item, {"order": {"$add": [{"$size": array_expr}, 1]}}]}
+    return {"$concatArrays": [array_expr, [new_item]]}
+
+def _map_module(module_index: int, transform) -> dict:
+    """
+    Expression d'agrégation : les modules du cours, où seul le module à la
+    position donnée est remplacé par transform(module).
+    """
+    return {"$map": {
+        "input": {"$range": [0, {"$size": "$modules"}]},
+        "as": "index",
+        "in": {"$let": {
+            "vars": {"module": {"$arrayElemAt": ["$modules", "$$index"]}},
+            "in": {"$cond": [
+                {"$eq": ["$$index", module_index]},
+                transform("$$module"),
+                "$$module"
+            ]}
+        }}
+    }}
+
+async def _raise_not_found(db, course_id: str, detail: str):
+    """Distingue un cours inexistant d'un module ou d'une leçon inexistant(e)."""
+    if not await db.courses.count_documents({"_id": ObjectId(course_id)}, limit=1):
+        raise HTTPException(status_code=404, detail="Cours non trouvé")
+    raise HTTPException(status_code=404, detail=detail)
+
 @router.post("/{course_id}/modules", response_model=CourseInDB)
 async def add_module(
     course_id: str,
@@ -114,50 +222,54 @@ async def add_module(
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-
-    # Calculer le nouvel ordre si non spécifié
-    if not module.order:
-        module.order = len(course.get("modules", [])) + 1
+    now = datetime.utcnow()
 
     module_dict = module.dict()
-    module_dict["created_at"] = datetime.utcnow()
-    module_dict["updated_at"] = datetime.utcnow()
+    module_dict["created_at"] = now
+    module_dict["updated_at"] = now
 
-    await db.courses.update_one(
+    # Calculer le nouvel ordre si non spécifié
+    updated_course = await db.courses.find_one_and_update(
         {"_id": ObjectId(course_id)},
-        {"$push": {"modules": module_dict}}
+        [{"$set": {
+            "modules": _append("$modules", module_dict, set_order=not module.order),
+            "updated_at": now
+        }}, {"$set": {"total_lessons": TOTAL_LESSONS_EXPR}}],
+        return_document=ReturnDocument.AFTER
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        raise HTTPException(status_code=404, detail="Cours non trouvé")
+    await invalidate_cache_tags("courses")
     return CourseInDB(**updated_course)
 
 @router.put("/{course_id}/modules/{module_index}", response_model=CourseInDB)
 async def update_module(
     course_id: str,
     module_index: int,
-    module_update: Module,
+    module_update: ModuleUpdate,
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-
-    if module_index >= len(course.get("modules", [])):
-        raise HTTPException(status_code=404, detail="Module non trouvé")
-
-    update_data = module_update.dict(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$set": {f"modules.{module_index}": update_data}}
+    now = datetime.utcnow()
+
+    # Seuls les champs envoyés sont modifiés : les leçons du module sont conservées
+    module_fields = module_update.dict(exclude_unset=True, exclude_none=True)
+    module_fields["updated_at"] = now
+
+    def update_in_module(module):
+        return {"$mergeObjects": [module, {"$literal": module_fields}]}
+
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": ObjectId(course_id), f"modules.{module_index}": {"$exists": True}},
+        [{"$set": {
+            "modules": _map_module(module_index, update_in_module),
+            "updated_at": now
+        }}],
+        return_document=ReturnDocument.AFTER
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        await _raise_not_found(db, course_id, "Module non trouvé")
+    await invalidate_cache_tags("courses")
     return CourseInDB(**updated_course)
 
 @router.delete("/{course_id}/modules/{module_index}", response_model=CourseInDB)
@@ -167,23 +279,18 @@ async def delete_module(
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-
-    if module_index >= len(course.get("modules", [])):
-        raise HTTPException(status_code=404, detail="Module non trouvé")
 
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$unset": {f"modules.{module_index}": ""}}
-    )
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$pull": {"modules": None}}
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": ObjectId(course_id), f"modules.{module_index}": {"$exists": True}},
+        [{"$set": {
+            "modules": _without_index("$modules", module_index),
+            "updated_at": datetime.utcnow()
+        }}, {"$set": {"total_lessons": TOTAL_LESSONS_EXPR}}],
+        return_document=ReturnDocument.AFTER
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        await _raise_not_found(db, course_id, "Module non trouvé")
+    await invalidate_cache_tags("courses")
     return CourseInDB(**updated_course)
 
 # Routes pour les leçons
@@ -195,28 +302,30 @@ async def add_lesson(
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-
-    if module_index >= len(course.get("modules", [])):
-        raise HTTPException(status_code=404, detail="Module non trouvé")
-
-    # Calculer le nouvel ordre si non spécifié
-    if not lesson.order:
-        module = course["modules"][module_index]
-        lesson.order = len(module.get("lessons", [])) + 1
+    now = datetime.utcnow()
 
     lesson_dict = lesson.dict()
-    lesson_dict["created_at"] = datetime.utcnow()
-    lesson_dict["updated_at"] = datetime.utcnow()
+    lesson_dict["created_at"] = now
+    lesson_dict["updated_at"] = now
 
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$push": {f"modules.{module_index}.lessons": lesson_dict}}
+    # Calculer le nouvel ordre si non spécifié
+    def add_to_module(module):
+        return {"$mergeObjects": [
+            module,
+            {"lessons": _append(f"{module}.lessons", lesson_dict, set_order=not lesson.order)}
+        ]}
+
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": ObjectId(course_id), f"modules.{module_index}": {"$exists": True}},
+        [{"$set": {
+            "modules": _map_module(module_index, add_to_module),
+            "updated_at": now
+        }}, {"$set": {"total_lessons": TOTAL_LESSONS_EXPR}}],
+        return_document=ReturnDocument.AFTER
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        await _raise_not_found(db, course_id, "Module non trouvé")
+    await invalidate_cache_tags("courses")
     return CourseInDB(**updated_course)
 
 @router.put("/{course_id}/modules/{module_index}/lessons/{lesson_index}", response_model=CourseInDB)
@@ -224,30 +333,28 @@ async def update_lesson(
     course_id: str,
     module_index: int,
     lesson_index: int,
-    lesson_update: Lesson,
+    lesson_update: LessonUpdate,
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
-
-    if module_index >= len(course.get("modules", [])):
-        raise HTTPException(status_code=404, detail="Module non trouvé")
-
-    module = course["modules"][module_index]
-    if lesson_index >= len(module.get("lessons", [])):
-        raise HTTPException(status_code=404, detail="Leçon non trouvée")
-
-    update_data = lesson_update.dict(exclude_unset=True)
-    update_data["updated_at"] = datetime.utcnow()
-
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$set": {f"modules.{module_index}.lessons.{lesson_index}": update_data}}
+    now = datetime.utcnow()
+
+    lesson_path = f"modules.{module_index}.lessons.{lesson_index}"
+    update_data = {
+        f"{lesson_path}.{field}": value
+        for field, value in lesson_update.dict(exclude_unset=True, exclude_none=True).items()
+    }
+    update_data[f"{lesson_path}.updated_at"] = now
+    update_data["updated_at"] = now
+
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": ObjectId(course_id), lesson_path: {"$exists": True}},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        await _raise_not_found(db, course_id, "Leçon non trouvée")
+    await invalidate_cache_tags("courses")
     return CourseInDB(**updated_course)
 
 @router.delete("/{course_id}/modules/{module_index}/lessons/{lesson_index}", response_model=CourseInDB)
@@ -258,27 +365,46 @@ async def delete_lesson(
     current_user = Depends(get_current_admin_user)
 ):
     db = await get_database()
-    course = await db.courses.find_one({"_id": ObjectId(course_id)})
-    if not course:
-        raise HTTPException(status_code=404, detail="Cours non trouvé")
 
-    if module_index >= len(course.get("modules", [])):
-        raise HTTPException(status_code=404, detail="Module non trouvé")
+    def remove_from_module(module):
+        return {"$mergeObjects": [
+            module,
+            {"lessons": _without_index(f"{module}.lessons", lesson_index)}
+        ]}
+
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": ObjectId(course_id), f"modules.{module_index}.lessons.{lesson_index}": {"$exists": True}},
+        [{"$set": {
+            "modules": _map_module(module_index, remove_from_module),
+            "updated_at": datetime.utcnow()
+        }}, {"$set": {"total_lessons": TOTAL_LESSONS_EXPR}}],
+        return_document=ReturnDocument.AFTER
+    )
+    if not updated_course:
+        await _raise_not_found(db, course_id, "Leçon non trouvée")
+    await invalidate_cache_tags("courses")
+    return CourseInDB(**updated_course)
 
-    module = course["modules"][module_index]
-    if lesson_index >= len(module.get("lessons", [])):
+# Routes pour les leçons, adressées par leur identifiant stable
+@router.get("/{course_id}/lessons/{lesson_id}", response_model=Lesson)
+async def get_lesson_by_id(course_id: str, lesson_id: str):
+    lesson = await get_lesson(course_id, lesson_id)
+    if not lesson:
         raise HTTPException(status_code=404, detail="Leçon non trouvée")
+    return lesson
 
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$unset": {f"modules.{module_index}.lessons.{lesson_index}": ""}}
-    )
-    await db.courses.update_one(
-        {"_id": ObjectId(course_id)},
-        {"$pull": {f"modules.{module_index}.lessons": None}}
+@router.put("/{course_id}/lessons/{lesson_id}", response_model=CourseInDB)
+async def update_lesson_by_id_route(
+    course_id: str,
+    lesson_id: str,
+    lesson_update: LessonUpdate,
+    current_user = Depends(get_current_admin_user)
+):
+    updated_course = await update_lesson_by_id(
+        course_id, lesson_id, lesson_update.dict(exclude_unset=True, exclude_none=True)
     )
-
-    updated_course = await db.courses.find_one({"_id": ObjectId(course_id)})
+    if not updated_course:
+        raise HTTPException(status_code=404, detail="Leçon non trouvée")
     return CourseInDB(**updated_course)
 
 # Route pour récupérer les cours auxquels l'utilisateur est inscrit
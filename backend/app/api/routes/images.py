@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import FileResponse
+from typing import Optional
+from ...core.config import settings
+from ...services.image_service import (
+    derivative_width,
+    get_derivative,
+    negotiate_format,
+    original_path,
+    pillow_available,
+)
+
+router = APIRouter()
+
+@router.get("/{filename}")
+async def get_image(
+    request: Request,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="Largeur maximale en pixels"),
+    format: Optional[str] = Query(None, pattern="^(avif|webp|jpeg|png)$")
+):
+    """
+    Sert une image uploadée, redimensionnée à la largeur demandée (arrondie à
+    la largeur configurée supérieure, sans agrandissement). Sans format
+    explicite, AVIF ou WebP est choisi selon l'en-tête Accept du client.
+    """
+    headers = {"Cache-Control": settings.IMAGE_CACHE_CONTROL}
+    if not pillow_available():
+        return FileResponse(original_path(filename), headers=headers)
+
+    output_format = negotiate_format(format, request.headers.get("accept", ""))
+    if format is None:
+        # Le format dépend de l'en-tête Accept
+        headers["Vary"] = "Accept"
+    width = derivative_width(w or max(settings.IMAGE_DERIVATIVE_WIDTHS))
+    path, media_type = await get_derivative(filename, width, output_format)
+    return FileResponse(path, media_type=media_type, headers=headers)
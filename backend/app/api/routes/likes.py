@@ -1,20 +1,22 @@
-from typing import Dict
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from fastapi.responses import JSONResponse
 
 from app.services.like_service import (
     toggle_post_like,
     get_post_likes_count,
-    check_user_liked_post
+    check_user_liked_post,
+    get_posts_like_states
 )
-from app.api.deps import get_current_user, get_optional_current_user
+from app.api.deps import get_current_principal, get_optional_current_principal
+from app.models.like import PostLikeState
 
 router = APIRouter()
 
 @router.post("/post/{post_id}", response_model=Dict[str, int])
 async def toggle_like_post(
     post_id: str,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_principal)
 ):
     """Ajoute ou retire un like à un article."""
     try:
@@ -27,7 +29,7 @@ async def toggle_like_post(
 @router.get("/post/{post_id}/count", response_model=Dict[str, int])
 async def get_post_likes_count_endpoint(
     post_id: str,
-    current_user = Depends(get_optional_current_user)
+    current_user = Depends(get_optional_current_principal)
 ):
     """Récupère le nombre de likes d'un article."""
     try:
@@ -46,3 +48,15 @@ async def get_post_likes_count_endpoint(
         raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/posts", response_model=Dict[str, PostLikeState])
+async def get_posts_like_states_endpoint(
+    post_ids: List[str] = Query(..., max_length=100),
+    current_user = Depends(get_optional_current_principal)
+):
+    """
+    Récupère en une fois le nombre de likes et l'état "liké" d'une liste d'articles,
+    par exemple pour tous les articles d'une page : /likes/posts?post_ids=a&post_ids=b
+    """
+    user_id = current_user.id if current_user else None
+    return await get_posts_like_states(post_ids, user_id)
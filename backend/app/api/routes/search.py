@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Query, Request
+from typing import List, Optional
+from ...core.pagination import NEXT_CURSOR_HEADER
+from ...core.response_cache import cached_response
+from ...core.responses import document_or_model
+from ...models.blog import BlogPostSearchResult
+from ...models.course import CourseSearchResult
+from ...models.search import Suggestion
+from ...services.autocomplete_service import BLOG_POST, COURSE, COURSE_CATEGORY, suggest
+from ...services.search_service import search_blog_posts, search_courses
+
+router = APIRouter()
+
+@router.get("/suggest", response_model=List[Suggestion])
+async def suggest_route(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    type: Optional[List[str]] = Query(None, description=f"{COURSE}, {COURSE_CATEGORY} ou {BLOG_POST}")
+):
+    """
+    Suggestions dont le titre, un mot du titre ou le slug commence par `q`,
+    servies depuis l'index en mémoire (sans requête MongoDB).
+    """
+    return suggest(q, limit, type)
+
+@router.get("/courses", response_model=List[CourseSearchResult])
+async def search_courses_route(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None
+):
+    """
+    Recherche dans les formations, triées par pertinence.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
+    headers = {}
+
+    async def build():
+        courses, next_cursor = await search_courses(q, limit, cursor)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [document_or_model(course, CourseSearchResult) for course in courses]
+
+    return await cached_response(request, ["courses"], build, headers)
+
+@router.get("/posts", response_model=List[BlogPostSearchResult])
+async def search_blog_posts_route(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = None
+):
+    """
+    Recherche dans les articles du blog, triés par pertinence.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor.
+    """
+    headers = {}
+
+    async def build():
+        posts, next_cursor = await search_blog_posts(q, limit, cursor)
+        if next_cursor:
+            headers[NEXT_CURSOR_HEADER] = next_cursor
+        return [document_or_model(post, BlogPostSearchResult) for post in posts]
+
+    return await cached_response(request, ["blog"], build, headers)
@@ -1,24 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Form, Request
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Depends
 from ...services.upload_service import save_upload_file
-from ...api.deps import get_current_user, get_optional_current_user
-from ...models.user import User
+from ...api.deps import get_current_active_user
+from ...models.user import UserInDB
 
 router = APIRouter()
 
 @router.post("/image", response_model=dict)
 async def upload_image(
     file: UploadFile = File(...),
-    current_user: Optional[User] = Depends(get_optional_current_user)
+    current_user: UserInDB = Depends(get_current_active_user)
 ):
     """
-    Télécharge une image et retourne son URL
+    Télécharge une image et retourne son URL. Réservé aux utilisateurs connectés.
+    Le format est vérifié d'après le contenu du fichier (415 si ce n'est pas
+    une image acceptée) et la taille est limitée par UPLOAD_MAX_SIZE (413).
     """
-    # Vérifier que le fichier est bien une image
-    if not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Le fichier doit être une image")
-    
     # Sauvegarder l'image
     file_path = await save_upload_file(file)
     
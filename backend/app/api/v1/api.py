@@ -8,7 +8,10 @@ from ..routes import (
     payments,
     course_progress,
     comments,
-    likes
+    likes,
+    upload,
+    images,
+    search
 )
 
 api_router = APIRouter()
@@ -22,5 +25,8 @@ api_router.include_router(payments.router, prefix="/payments", tags=["payments"]
 api_router.include_router(course_progress.router, prefix="/course-progress", tags=["course-progress"])
 api_router.include_router(comments.router, prefix="/comments", tags=["comments"])
 api_router.include_router(likes.router, prefix="/likes", tags=["likes"])
+api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
+api_router.include_router(images.router, prefix="/images", tags=["images"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 
 __all__ = ["api_router"] 
\ No newline at end of file
@@ -1,14 +1,41 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from pydantic import ValidationError
 from datetime import datetime, timedelta
 from typing import Optional
 from ..core.config import settings
-from ..db.database import get_database
 from ..models.user import UserInDB
-from bson import ObjectId
+from ..schemas.token import TokenPayload, Principal
+from ..services.user_service import get_user_by_id
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
+# auto_error=False : l'absence de token est gérée par les dépendances elles-mêmes,
+# ce qui permet de partager le même schéma avec get_optional_current_user
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login", auto_error=False)
+
+class TokenVerifier:
+    """
+    Décode et vérifie les tokens JWT de l'application.
+    La clé de signature est construite une seule fois au lieu d'être
+    reconstruite par python-jose à chaque décodage.
+    """
+    def __init__(self, secret_key: str, algorithm: str):
+        self.algorithm = algorithm
+        self._key = jwk.construct(secret_key, algorithm)
+
+    def decode(self, token: str) -> TokenPayload:
+        """Lève JWTError ou ValidationError si le token est invalide."""
+        payload = jwt.decode(token, self._key, algorithms=[self.algorithm])
+        return TokenPayload(**payload)
+
+token_verifier = TokenVerifier(settings.SECRET_KEY, settings.ALGORITHM)
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Impossible de valider les informations d'identification",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -20,38 +47,109 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+def _decode_request_token(request: Request, token: str) -> TokenPayload:
+    """Décode le token une seule fois par requête."""
+    token_data = getattr(request.state, "token_payload", None)
+    if token_data is None:
+        token_data = token_verifier.decode(token)
+        if token_data.sub is None:
+            raise JWTError("Token sans sujet")
+        request.state.token_payload = token_data
+    return token_data
+
+async def get_token_payload(request: Request, token: Optional[str] = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    Vérifie le token JWT de la requête et retourne son contenu.
+    """
+    if not token:
+        raise _credentials_exception()
+    try:
+        return _decode_request_token(request, token)
+    except (JWTError, ValidationError):
+        raise _credentials_exception()
+
+async def get_current_principal(token_data: TokenPayload = Depends(get_token_payload)) -> Principal:
+    """
+    Identité de l'utilisateur construite uniquement à partir des claims du token,
+    sans accès à MongoDB. À réserver aux routes qui n'ont besoin que de l'ID.
+    """
+    try:
+        return Principal(id=token_data.sub, is_admin=token_data.is_admin)
+    except ValidationError:
+        # Token correctement signé mais dont le sujet n'est pas un ObjectId
+        raise _credentials_exception()
+
+async def get_optional_current_principal(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme)
+) -> Optional[Principal]:
+    """
+    Comme get_current_principal, mais retourne None si le token est absent ou invalide.
+    """
+    if not token:
+        return None
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    db = await get_database()
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+        token_data = _decode_request_token(request, token)
+        return Principal(id=token_data.sub, is_admin=token_data.is_admin)
+    except (JWTError, ValidationError):
+        return None
+
+async def get_current_user(
+    request: Request,
+    token_data: TokenPayload = Depends(get_token_payload)
+) -> UserInDB:
+    """
+    Récupère l'utilisateur actuel à partir du token JWT.
+    Le résultat est mémorisé sur la requête pour ne pas être recalculé
+    par les dépendances imbriquées.
+    """
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
+    user = await get_user_by_id(token_data.sub)
     if user is None:
-        raise credentials_exception
-    
-    # Convertir l'ObjectId en str pour la sérialisation
-    user["_id"] = str(user["_id"])
-    return UserInDB(**user)
+        raise _credentials_exception()
+
+    request.state.current_user = user
+    return user
 
-async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)):
+async def get_optional_current_user(request: Request, token: Optional[str] = Depends(oauth2_scheme)) -> Optional[UserInDB]:
+    """
+    Récupère l'utilisateur actuel à partir du token JWT, mais ne lève pas d'exception si le token est invalide.
+    """
+    if not token:
+        return None
+
+    current_user = getattr(request.state, "current_user", None)
+    if current_user is not None:
+        return current_user
+
+    try:
+        token_data = _decode_request_token(request, token)
+    except (JWTError, ValidationError):
+        return None
+
+    user = await get_user_by_id(token_data.sub)
+    if user is not None:
+        request.state.current_user = user
+    return user
+
+async def get_current_active_user(current_user: UserInDB = Depends(get_current_user)) -> UserInDB:
+    """
+    Vérifie que l'utilisateur est actif.
+    """
     if not current_user.is_active:
-        raise HTTPException(status_code=400, detail="Inactive user")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Utilisateur inactif")
     return current_user
 
-async def get_current_admin_user(current_user: UserInDB = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: UserInDB = Depends(get_current_active_user)) -> UserInDB:
+    """
+    Vérifie que l'utilisateur est un administrateur.
+    """
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="The user doesn't have enough privileges"
+            detail="Droits d'administrateur requis",
         )
-    return current_user 
\ No newline at end of file
+    return current_user
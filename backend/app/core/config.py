@@ -15,9 +15,73 @@ class Settings(BaseSettings):
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
     
+    # Hachage des mots de passe (bcrypt)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    # Nombre maximum d'opérations en cours ou en attente avant de répondre 503
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 32))
+    
+    # Cache des utilisateurs authentifiés
+    USER_CACHE_SIZE: int = int(os.getenv("USER_CACHE_SIZE", 1024))
+    USER_CACHE_TTL: int = int(os.getenv("USER_CACHE_TTL", 60))  # en secondes
+    
+    # Cache des réponses des routes publiques en lecture.
+    # Cache partagé entre les workers (nécessite le paquet redis), vide pour un cache en mémoire
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    # Activé par défaut seulement avec Redis : le cache en mémoire n'est invalidé
+    # que dans le worker qui a traité l'écriture, les autres serviraient des
+    # réponses périmées jusqu'à RESPONSE_CACHE_TTL. À n'activer sans Redis
+    # qu'avec un seul worker.
+    RESPONSE_CACHE_ENABLED: bool = os.getenv(
+        "RESPONSE_CACHE_ENABLED", "true" if os.getenv("REDIS_URL") else "false"
+    ).lower() == "true"
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", 512))
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", 300))  # en secondes
+    
+    # En-têtes Cache-Control des routes de détail (validées par ETag / Last-Modified)
+    COURSE_DETAIL_CACHE_CONTROL: str = os.getenv("COURSE_DETAIL_CACHE_CONTROL", "public, no-cache")
+    BLOG_POST_CACHE_CONTROL: str = os.getenv("BLOG_POST_CACHE_CONTROL", "public, no-cache")
+    
+    # Sérialisation directe des documents MongoDB par orjson sur les routes de lecture,
+    # sans construction ni validation des modèles Pydantic
+    FAST_JSON_RESPONSES: bool = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+    
     # CORS
     BACKEND_CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000"]
     
+    # Intervalle (en secondes) de resynchronisation des compteurs de likes, 0 pour désactiver
+    LIKES_RECONCILE_INTERVAL: int = int(os.getenv("LIKES_RECONCILE_INTERVAL", 3600))
+    
+    # Commentaires : profondeur maximale des réponses incluses dans une page
+    # et nombre maximum de réponses incluses par commentaire de premier niveau
+    COMMENTS_MAX_DEPTH: int = int(os.getenv("COMMENTS_MAX_DEPTH", 3))
+    COMMENTS_MAX_EMBEDDED_REPLIES: int = int(os.getenv("COMMENTS_MAX_EMBEDDED_REPLIES", 20))
+    # Intervalle (en secondes) de purge des commentaires orphelins, 0 pour désactiver
+    COMMENTS_ORPHAN_SWEEP_INTERVAL: int = int(os.getenv("COMMENTS_ORPHAN_SWEEP_INTERVAL", 3600))
+    
+    # Upload d'images : taille maximale (en octets) et taille des blocs écrits sur le disque
+    UPLOAD_MAX_SIZE: int = int(os.getenv("UPLOAD_MAX_SIZE", 10 * 1024 * 1024))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", 256 * 1024))
+    
+    # Ramasse-miettes des uploads : intervalle (en secondes, 0 pour désactiver) et âge
+    # minimum (en secondes) d'un fichier non référencé avant sa suppression
+    UPLOADS_GC_INTERVAL: int = int(os.getenv("UPLOADS_GC_INTERVAL", 3600))
+    UPLOADS_GC_GRACE_PERIOD: int = int(os.getenv("UPLOADS_GC_GRACE_PERIOD", 24 * 3600))
+    
+    # Déclinaisons redimensionnées des images : répertoire et taille maximale (en octets)
+    # du cache disque, largeurs produites, qualité d'encodage et en-tête Cache-Control
+    IMAGE_CACHE_DIR: str = os.getenv("IMAGE_CACHE_DIR", "cache/images")
+    IMAGE_CACHE_MAX_SIZE: int = int(os.getenv("IMAGE_CACHE_MAX_SIZE", 512 * 1024 * 1024))
+    IMAGE_DERIVATIVE_WIDTHS: list = [
+        int(width) for width in os.getenv("IMAGE_DERIVATIVE_WIDTHS", "160,320,640,960,1280,1920").split(",")
+    ]
+    IMAGE_DERIVATIVE_QUALITY: int = int(os.getenv("IMAGE_DERIVATIVE_QUALITY", 80))
+    IMAGE_CACHE_CONTROL: str = os.getenv("IMAGE_CACHE_CONTROL", "public, max-age=31536000, immutable")
+    
+    # Intervalle (en secondes) de vérification de la version de l'index d'autocomplétion,
+    # modifié par les autres workers ; 0 pour désactiver
+    AUTOCOMPLETE_SYNC_INTERVAL: int = int(os.getenv("AUTOCOMPLETE_SYNC_INTERVAL", 5))
+    
     # URL du backend
     BACKEND_HOST: str = os.getenv("BACKEND_HOST", "http://localhost:8000")
 
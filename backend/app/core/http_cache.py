@@ -0,0 +1,107 @@
+"""
+Requêtes conditionnelles (ETag / Last-Modified) pour les routes de détail.
+
+La validité d'une ressource est vérifiée en ne lisant que son champ
+updated_at : si le client possède déjà la version courante, une réponse 304
+est renvoyée sans charger ni sérialiser le document.
+
+Les en-têtes ETag et Last-Modified sont stockés avec le corps dans le cache de
+réponses : une requête non conditionnelle servie depuis le cache ne fait
+aucun accès à MongoDB.
+
+Quand la réponse inclut des données d'autres documents (l'auteur d'un
+article), leurs dates updated_at entrent dans le validateur : la version
+retenue est la plus récente de toutes.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from fastapi import Request, Response
+
+from .response_cache import cached_response, read_cached_response
+
+def make_etag(updated_at: datetime) -> str:
+    # ETag faible : deux représentations de la même version sont équivalentes
+    return f'W/"{int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000)}"'
+
+def _http_date(value: datetime) -> str:
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def is_not_modified(request: Request, etag: str, updated_at: datetime) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match est prioritaire sur If-Modified-Since ; comparaison faible
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(
+            tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # Les dates HTTP sont à la seconde près
+        return updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+async def conditional_response(
+    request: Request,
+    collection,
+    query: Dict[str, Any],
+    cache_control: str,
+    tags: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+    fields: Iterable[str] = (),
+    related_updated_at: Optional[Callable[[Dict[str, Any]], Awaitable[Optional[datetime]]]] = None
+) -> Response:
+    """
+    Renvoie 304 si la version du client est à jour, sinon la réponse mise en
+    cache sous `tags` (obtenue via `build` si absente), avec les en-têtes ETag,
+    Last-Modified et Cache-Control. updated_at n'est lu que si la requête est
+    conditionnelle ou si la réponse n'est pas en cache.
+
+    `related_updated_at` reçoit le document (updated_at et `fields`) et
+    retourne la date de modification des données jointes à la réponse.
+    Un document absent ou sans updated_at est servi sans validateurs.
+    """
+    conditional = is_conditional(request)
+    if not conditional:
+        response = await read_cached_response(request)
+        if response is not None:
+            return response
+
+    projection = {"_id": 0, "updated_at": 1, **{field: 1 for field in fields}}
+    doc: Optional[Dict[str, Any]] = await collection.find_one(query, projection)
+    updated_at = doc.get("updated_at") if doc else None
+    if not isinstance(updated_at, datetime):
+        return await cached_response(request, tags, build, lookup=conditional)
+    if related_updated_at is not None:
+        related = await related_updated_at(doc)
+        if isinstance(related, datetime) and related > updated_at:
+            updated_at = related
+
+    etag = make_etag(updated_at)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": _http_date(updated_at),
+        "Cache-Control": cache_control,
+    }
+    if is_not_modified(request, etag, updated_at):
+        return Response(status_code=304, headers=headers)
+
+    if conditional:
+        # Une réponse en cache n'est servie que si elle correspond à la version courante
+        response = await read_cached_response(request)
+        if response is not None and response.headers.get("etag") == etag:
+            return response
+
+    # Les validateurs sont mis en cache avec le corps de la réponse
+    return await cached_response(request, tags, build, headers, lookup=False)
@@ -0,0 +1,101 @@
+"""
+Pagination par curseur (keyset) sur un champ de tri et l'_id.
+
+Contrairement à skip/limit, le coût d'une page ne dépend pas de sa position :
+la requête reprend directement après le dernier document renvoyé, grâce à un
+index composé (champ de tri, _id). Le curseur transmis au client est opaque.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+# En-tête de réponse contenant le curseur de la page suivante
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(value: Any, _id: ObjectId) -> str:
+    if isinstance(value, datetime):
+        payload = ["d", value.isoformat(), str(_id)]
+    else:
+        payload = ["v", value, str(_id)]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, value, _id = json.loads(raw)
+        if kind == "d":
+            value = datetime.fromisoformat(value)
+        return value, ObjectId(_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+def keyset_filter(sort_field: str, cursor: str, descending: bool = False) -> Dict[str, Any]:
+    """Filtre des documents situés après le curseur dans l'ordre (sort_field, _id)."""
+    value, _id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    if sort_field == "_id":
+        return {"_id": {op: _id}}
+    return {"$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, "_id": {op: _id}},
+    ]}
+
+def page_query(
+    query: Dict[str, Any],
+    cursor: Optional[str] = None,
+    sort_field: str = "created_at",
+    descending: bool = False
+) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """Retourne le filtre et le tri d'une page, utilisables avec find() ou $match/$sort."""
+    if cursor:
+        query = {"$and": [query, keyset_filter(sort_field, cursor, descending)]}
+    direction = DESCENDING if descending else ASCENDING
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+    return query, sort
+
+def next_page(
+    docs: List[Dict[str, Any]],
+    limit: int,
+    sort_field: str = "created_at"
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Tronque les documents lus avec une limite de `limit + 1` et calcule le
+    curseur de la page suivante (None s'il n'y a plus de résultats).
+    """
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    value = None if sort_field == "_id" else last.get(sort_field)
+    return docs, encode_cursor(value, last["_id"])
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str] = None,
+    sort_field: str = "created_at",
+    descending: bool = False,
+    projection: Optional[Dict[str, Any]] = None,
+    skip: int = 0
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Retourne une page de documents et le curseur de la page suivante.
+    `skip` n'est conservé que pour la compatibilité et ignoré si un curseur est fourni.
+    """
+    query, sort = page_query(query, cursor, sort_field, descending)
+    find_cursor = collection.find(query, projection).sort(sort)
+    if skip and not cursor:
+        find_cursor = find_cursor.skip(skip)
+
+    # Un document de plus que demandé pour savoir s'il existe une page suivante
+    docs = await find_cursor.limit(limit + 1).to_list(length=limit + 1)
+    return next_page(docs, limit, sort_field)
@@ -0,0 +1,58 @@
+"""
+Limite de taille du corps des requêtes d'upload.
+
+Starlette reçoit et met en mémoire tampon (ou sur disque) tout le corps
+multipart avant d'appeler la route : la limite vérifiée par save_upload_file
+ne borne donc pas ce que le serveur reçoit. Ce middleware ASGI refuse la
+requête avant l'analyse du formulaire, d'après l'en-tête Content-Length s'il
+est présent, puis en comptant les octets reçus au fil de l'eau.
+"""
+from typing import Iterable
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Marge pour les en-têtes et délimiteurs multipart autour du fichier
+MULTIPART_OVERHEAD = 64 * 1024
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Le fichier dépasse la taille maximale de {max_size} octets"
+    )
+
+class BodySizeLimitMiddleware:
+    """Refuse (413) les requêtes vers `paths` dont le corps dépasse `max_size` octets."""
+    def __init__(self, app: ASGIApp, max_size: int, paths: Iterable[str]):
+        self.app = app
+        self.max_size = max_size
+        self.max_body_size = max_size + MULTIPART_OVERHEAD
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_size:
+            # Refus immédiat, sans lire le corps
+            error = _too_large(self.max_size)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Relevée par FastAPI telle quelle pendant l'analyse du corps
+                    raise _too_large(self.max_size)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,171 @@
+"""
+Cache des réponses des routes publiques en lecture.
+
+Les réponses sont stockées déjà sérialisées en JSON, avec une clé construite à
+partir du chemin et des paramètres de la requête. Chaque entrée est rattachée
+à des tags (par exemple "blog" ou "courses") ; les fonctions d'écriture
+appellent invalidate_cache_tags pour supprimer toutes les entrées d'un tag.
+
+Si REDIS_URL est défini et que le paquet redis est installé, un client
+redis.asyncio est utilisé : il expose les méthodes get, set, delete, sadd,
+smembers et expire, et partage le cache et ses invalidations entre les
+workers. Sinon, le backend est un cache LRU en mémoire propre à chaque
+processus, dont les invalidations ne concernent que le worker qui a traité
+l'écriture : le cache n'est alors activé que sur demande
+(RESPONSE_CACHE_ENABLED), pour un déploiement à un seul worker.
+"""
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+
+from .cache import TTLCache
+from .config import settings
+from .responses import render_json
+
+KEY_PREFIX = "response:"
+TAG_PREFIX = "response-tag:"
+
+class MemoryCacheBackend:
+    """Backend en mémoire offrant le sous-ensemble de l'API Redis utilisé par le cache."""
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tags: Dict[str, Set[str]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> None:
+        self._entries.set(key, value, ttl=ex)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if key in self._tags:
+                del self._tags[key]
+                deleted += 1
+            elif key in self._entries:
+                self._entries.delete(key)
+                deleted += 1
+        return deleted
+
+    async def sadd(self, key: str, *members: str) -> int:
+        tag_members = self._tags.setdefault(key, set())
+        before = len(tag_members)
+        tag_members.update(members)
+        # Les entrées expirées ou évincées n'ont plus besoin d'être suivies
+        if len(tag_members) > self._entries.maxsize:
+            tag_members.intersection_update(
+                member for member in list(tag_members) if member in self._entries
+            )
+        return len(tag_members) - before
+
+    async def smembers(self, key: str) -> Set[str]:
+        return set(self._tags.get(key, ()))
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        # Les tags en mémoire sont élagués par sadd
+        return key in self._tags
+
+_backend = None
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        _backend = _create_backend()
+    return _backend
+
+def set_cache_backend(backend) -> None:
+    """Remplace le backend du cache, par exemple par un faux Redis local."""
+    global _backend
+    _backend = backend
+
+def _create_backend():
+    if settings.REDIS_URL:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            print(
+                "Le paquet redis n'est pas installé, utilisation du cache de réponses en mémoire "
+                "(non partagé entre les workers)"
+            )
+        else:
+            return redis_asyncio.from_url(settings.REDIS_URL)
+    return MemoryCacheBackend(maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL)
+
+def cache_key(request: Request) -> str:
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    return f"{KEY_PREFIX}{request.url.path}?{query}"
+
+def _pack(body: bytes, headers: Dict[str, str]) -> bytes:
+    # Les en-têtes (ex. X-Next-Cursor) sont stockés sur la première ligne
+    return json.dumps(headers).encode() + b"\n" + body
+
+def _unpack(value: bytes) -> Tuple[bytes, Dict[str, str]]:
+    headers, body = value.split(b"\n", 1)
+    return body, json.loads(headers)
+
+async def read_cached_response(request: Request) -> Optional[Response]:
+    """Retourne la réponse en cache pour cette requête, ou None."""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    try:
+        cached = await get_cache_backend().get(cache_key(request))
+    except Exception as e:
+        # Le cache ne doit jamais rendre une route publique indisponible
+        print(f"Erreur de lecture du cache de réponses: {e}")
+        return None
+    if cached is None:
+        return None
+    body, response_headers = _unpack(cached)
+    return Response(body, media_type="application/json", headers=response_headers)
+
+async def cached_response(
+    request: Request,
+    tags: Iterable[str],
+    build: Callable[[], Awaitable[Any]],
+    headers: Optional[Dict[str, str]] = None,
+    lookup: bool = True
+) -> Response:
+    """
+    Retourne la réponse en cache pour cette requête, ou l'obtient via `build`,
+    la sérialise et la met en cache. `headers` est un dictionnaire que `build`
+    peut remplir avec les en-têtes à conserver avec le corps de la réponse.
+    `lookup=False` évite de relire le cache quand l'appelant vient de le faire.
+    """
+    if headers is None:
+        headers = {}
+    if not settings.RESPONSE_CACHE_ENABLED:
+        content = await build()
+        return Response(render_json(content), media_type="application/json", headers=headers)
+
+    if lookup:
+        response = await read_cached_response(request)
+        if response is not None:
+            return response
+
+    content = await build()
+    body = render_json(content)
+    key = cache_key(request)
+    try:
+        backend = get_cache_backend()
+        await backend.set(key, _pack(body, headers), ex=settings.RESPONSE_CACHE_TTL)
+        for tag in tags:
+            await backend.sadd(TAG_PREFIX + tag, key)
+            # Un tag ne survit pas à sa dernière entrée : sans expiration, les
+            # clés des entrées expirées s'accumuleraient jusqu'à l'invalidation
+            await backend.expire(TAG_PREFIX + tag, settings.RESPONSE_CACHE_TTL)
+    except Exception as e:
+        print(f"Erreur d'écriture du cache de réponses: {e}")
+    return Response(body, media_type="application/json", headers=headers)
+
+async def invalidate_cache_tags(*tags: str) -> None:
+    """Supprime toutes les réponses en cache rattachées à ces tags."""
+    backend = get_cache_backend()
+    for tag in tags:
+        tag_key = TAG_PREFIX + tag
+        try:
+            keys = await backend.smembers(tag_key)
+            await backend.delete(*keys, tag_key)
+        except Exception as e:
+            print(f"Erreur lors de l'invalidation du cache de réponses ({tag}): {e}")
@@ -0,0 +1,52 @@
+"""
+Sérialisation JSON des réponses.
+
+Par défaut, les routes construisent des modèles Pydantic que FastAPI valide et
+sérialise. Avec FAST_JSON_RESPONSES activé, les routes de lecture les plus
+lourdes renvoient directement les documents MongoDB (déjà restreints aux
+champs du modèle par projection), sérialisés en une seule passe par orjson,
+qui gère nativement datetime et convertit ObjectId via `_default`.
+"""
+from typing import Any, Dict, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .config import settings
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+def render_json(content: Any) -> bytes:
+    """Sérialise le contenu d'une réponse selon le mode configuré."""
+    if settings.FAST_JSON_RESPONSES:
+        return dumps(content)
+    return JSONResponse(jsonable_encoder(content)).body
+
+class ORJSONDocumentResponse(JSONResponse):
+    """Réponse JSON pour des documents MongoDB de confiance, sans validation."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """Projection MongoDB limitée aux champs (alias compris) d'un modèle."""
+    return {field.alias or name: 1 for name, field in model.model_fields.items()}
+
+def document_or_model(doc: Dict[str, Any], model: Type[BaseModel]) -> Any:
+    """
+    Retourne le document tel quel en mode rapide, sinon le modèle validé.
+    Le document doit avoir été lu avec model_projection(model).
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return doc
+    return model(**doc)
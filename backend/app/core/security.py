@@ -1,12 +1,23 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+from fastapi import HTTPException, status
 from jose import jwt
 from passlib.context import CryptContext
 import bcrypt
 from ..core.config import settings
 
 # Utiliser une configuration plus simple pour éviter les problèmes de compatibilité
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# Pool dédié au hachage : bcrypt bloque le thread pendant toute la durée du calcul,
+# il ne doit donc jamais s'exécuter sur la boucle d'événements.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_pool_stats = {"pending": 0, "completed": 0, "rejected": 0}
 
 def create_access_token(subject: Union[str, Any], is_admin: bool = False, expires_delta: timedelta = None) -> str:
     to_encode = {"sub": str(subject), "is_admin": is_admin}
@@ -18,3 +29,44 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+async def _run_password_job(func: Callable, *args):
+    """
+    Exécute une opération de hachage dans le pool dédié.
+    Répond 503 immédiatement si trop d'opérations sont déjà en attente.
+    """
+    if _password_pool_stats["pending"] >= settings.PASSWORD_HASH_MAX_PENDING:
+        _password_pool_stats["rejected"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serveur surchargé, veuillez réessayer dans quelques instants",
+            headers={"Retry-After": "1"},
+        )
+    
+    _password_pool_stats["pending"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_pool_stats["pending"] -= 1
+        _password_pool_stats["completed"] += 1
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie le mot de passe et retourne un nouveau hash si le coût configuré
+    a changé depuis le hachage d'origine (None sinon).
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
+
+def get_password_pool_stats() -> Dict[str, int]:
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        **_password_pool_stats,
+    }
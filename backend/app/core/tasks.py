@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+# Tâches de fond démarrées avec l'application
+_background_tasks: List[asyncio.Task] = []
+
+async def _run_periodically(name: str, interval: float, func: Callable[[], Awaitable]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await func()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Une exécution en échec ne doit pas arrêter les suivantes
+            print(f"Erreur lors de la tâche périodique {name}: {e}")
+
+def start_periodic_task(name: str, interval: float, func: Callable[[], Awaitable]) -> None:
+    """
+    Exécute func toutes les `interval` secondes tant que l'application tourne.
+    Un intervalle nul ou négatif désactive la tâche.
+    """
+    if interval <= 0:
+        return
+    task = asyncio.create_task(_run_periodically(name, interval, func), name=name)
+    _background_tasks.append(task)
+
+async def stop_background_tasks() -> None:
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
@@ -1,22 +1,7 @@
-from bson import ObjectId
-from pydantic import BaseModel, Field
-from typing import Any
+"""
+Ce module réexporte PyObjectId de utils/object_id_handler.py, l'unique
+implémentation du type utilisée par tous les modèles.
+"""
+from ..utils.object_id_handler import PyObjectId
 
-class PyObjectId(ObjectId):
-    """
-    Helper class to convert MongoDB ObjectId to string and vice versa.
-    This allows Pydantic to validate the ObjectId type.
-    """
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __modify_schema__(cls, field_schema):
-        field_schema.update(type="string")
+__all__ = ["PyObjectId"]
@@ -0,0 +1,158 @@
+"""
+Registre déclaratif des index MongoDB utilisés par les services.
+
+Les index sont créés de manière idempotente au démarrage de l'application.
+Le module peut aussi être lancé en ligne de commande pour obtenir un rapport
+des index manquants ou inutilisés :
+
+    python -m app.db.indexes            # rapport
+    python -m app.db.indexes --apply    # création des index manquants puis rapport
+"""
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+# Index plein texte : racinisation française ; language_override désigne un champ
+# inexistant pour que le champ "language" des formations ne change pas la langue
+TEXT_INDEX_OPTIONS = {"default_language": "french", "language_override": "text_language"}
+
+# Index déclarés par collection. Les noms sont explicites pour pouvoir
+# comparer le registre avec les index réellement présents en base.
+# Un index dont les clés changent doit changer de nom : l'ancien apparaît
+# alors comme "undeclared" dans le rapport et peut être supprimé.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "blog_posts": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("published_at", DESCENDING), ("_id", DESCENDING)], name="published_at_id"),
+        IndexModel(
+            [("category", ASCENDING), ("published_at", DESCENDING), ("_id", DESCENDING)],
+            name="category_published_at_id"
+        ),
+        IndexModel(
+            [("title", TEXT), ("excerpt", TEXT), ("tags", TEXT), ("content", TEXT)],
+            name="text_search",
+            weights={"title": 10, "tags": 5, "excerpt": 3, "content": 1},
+            **TEXT_INDEX_OPTIONS
+        ),
+    ],
+    "categories": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+    ],
+    "courses": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("category_id", ASCENDING), ("_id", ASCENDING)], name="category_id_id"),
+        IndexModel([("is_active", ASCENDING), ("_id", ASCENDING)], name="is_active"),
+        IndexModel([("modules.id", ASCENDING)], name="module_id"),
+        IndexModel([("modules.lessons.id", ASCENDING)], name="lesson_id"),
+        IndexModel(
+            [("title", TEXT), ("description", TEXT), ("objectives", TEXT), ("modules.lessons.title", TEXT)],
+            name="text_search",
+            weights={"title": 10, "objectives": 4, "modules.lessons.title": 3, "description": 2},
+            **TEXT_INDEX_OPTIONS
+        ),
+    ],
+    "course_categories": [
+        IndexModel([("slug", ASCENDING)], name="slug_unique", unique=True),
+        IndexModel([("is_active", ASCENDING), ("_id", ASCENDING)], name="is_active"),
+    ],
+    "comments": [
+        IndexModel(
+            [("post_id", ASCENDING), ("parent_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="post_parent_created_at"
+        ),
+        IndexModel([("parent_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)], name="parent_created_at"),
+        IndexModel([("ancestors", ASCENDING)], name="ancestors"),
+    ],
+    "post_likes": [
+        IndexModel([("post_id", ASCENDING), ("user_id", ASCENDING)], name="post_user_unique", unique=True),
+    ],
+    "comment_likes": [
+        IndexModel([("comment_id", ASCENDING), ("user_id", ASCENDING)], name="comment_user_unique", unique=True),
+    ],
+    "user_course_progress": [
+        IndexModel([("user_id", ASCENDING), ("course_id", ASCENDING)], name="user_course_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id"),
+    ],
+}
+
+async def ensure_indexes(database) -> Dict[str, List[str]]:
+    """
+    Crée les index déclarés qui n'existent pas encore.
+    Un index en échec (doublons existants, options différentes) est signalé
+    sans empêcher la création des autres.
+    Retourne les noms des index créés ou confirmés par collection.
+    """
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        created[collection_name] = []
+        for index in indexes:
+            try:
+                names = await collection.create_indexes([index])
+                created[collection_name].extend(names)
+            except OperationFailure as e:
+                print(f"Impossible de créer l'index {index.document['name']} sur {collection_name}: {e}")
+    return created
+
+async def index_report(database) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Compare le registre avec les index présents en base.
+    Pour chaque collection : index déclarés manquants, index déclarés jamais
+    utilisés depuis le démarrage du serveur ($indexStats) et index présents
+    en base mais absents du registre.
+    """
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        declared = {index.document["name"] for index in indexes}
+
+        existing = set()
+        async for index in collection.list_indexes():
+            existing.add(index["name"])
+        existing.discard("_id_")
+
+        usage = {}
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                usage[stats["name"]] = stats["accesses"]["ops"]
+        except OperationFailure as e:
+            print(f"$indexStats indisponible pour {collection_name}: {e}")
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "unused": sorted(name for name in declared & existing if usage.get(name) == 0),
+            "undeclared": sorted(existing - declared),
+        }
+    return report
+
+def print_index_report(report: Dict[str, Dict[str, List[str]]]) -> None:
+    for collection_name, entry in report.items():
+        status = "OK" if not entry["missing"] else "INDEX MANQUANTS"
+        print(f"{collection_name}: {status}")
+        for key in ("missing", "unused", "undeclared"):
+            if entry[key]:
+                print(f"  {key}: {', '.join(entry[key])}")
+
+async def _main(apply: bool) -> None:
+    from .database import connect_to_mongo, close_mongo_connection, get_database
+
+    await connect_to_mongo()
+    try:
+        database = await get_database()
+        if apply:
+            await ensure_indexes(database)
+        print_index_report(await index_report(database))
+    finally:
+        await close_mongo_connection()
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    parser = argparse.ArgumentParser(description="Rapport des index MongoDB déclarés")
+    parser.add_argument("--apply", action="store_true", help="créer les index manquants avant le rapport")
+    args = parser.parse_args()
+    asyncio.run(_main(args.apply))
@@ -5,13 +5,31 @@ import os
 from pathlib import Path
 from .api.v1.api import api_router
 from .core.config import settings
-from .db.database import connect_to_mongo, close_mongo_connection
+from .db.database import connect_to_mongo, close_mongo_connection, get_database
+from .db.indexes import ensure_indexes
+from .core.pagination import NEXT_CURSOR_HEADER
+from .core.request_limits import BodySizeLimitMiddleware
+from .core.tasks import start_periodic_task, stop_background_tasks
+from .services.course_service import ensure_course_item_ids, ensure_course_lesson_counts
+from .services.like_service import reconcile_post_likes_counts
+from .services.comment_service import ensure_comment_ancestors, purge_orphan_comments
+from .services.upload_service import collect_orphan_uploads, ensure_upload_refs
+from .services.blog_service import ensure_post_image_refs
+from .services.autocomplete_service import build_autocomplete_index, sync_autocomplete_index
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Limiter la taille des uploads avant l'analyse du formulaire.
+# Ajouté avant CORS pour que les réponses 413 portent les en-têtes CORS.
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_size=settings.UPLOAD_MAX_SIZE,
+    paths=[f"{settings.API_V1_STR}/upload"],
+)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +37,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Include API router
@@ -37,9 +56,21 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    await ensure_indexes(await get_database())
+    await ensure_course_item_ids()
+    await ensure_course_lesson_counts()
+    await ensure_comment_ancestors()
+    # Des références d'articles réanalysées invalident leur décompte
+    await ensure_upload_refs(rebuild=await ensure_post_image_refs() > 0)
+    await build_autocomplete_index()
+    start_periodic_task("reconcile_post_likes", settings.LIKES_RECONCILE_INTERVAL, reconcile_post_likes_counts)
+    start_periodic_task("purge_orphan_comments", settings.COMMENTS_ORPHAN_SWEEP_INTERVAL, purge_orphan_comments)
+    start_periodic_task("collect_orphan_uploads", settings.UPLOADS_GC_INTERVAL, collect_orphan_uploads)
+    start_periodic_task("sync_autocomplete_index", settings.AUTOCOMPLETE_SYNC_INTERVAL, sync_autocomplete_index)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await stop_background_tasks()
     await close_mongo_connection()
 
 @app.get("/")
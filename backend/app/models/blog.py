@@ -1,9 +1,10 @@
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field
-from .user import PyObjectId, UserInDB
 from bson import ObjectId
 
+from ..utils.object_id_handler import PyObjectId
+
 class BlogPostBase(BaseModel):
     title: str
     slug: str
@@ -26,7 +27,7 @@ class BlogPostUpdate(BaseModel):
     tags: Optional[List[str]] = None
 
 class BlogPostInDB(BlogPostBase):
-    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     published_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -58,8 +59,26 @@ class BlogPostWithAuthor(BlogPostInDB):
         "arbitrary_types_allowed": True
     }
 
+class BlogPostSearchResult(BaseModel):
+    """Article trouvé par la recherche (sans son contenu), avec son score de pertinence"""
+    id: PyObjectId = Field(alias="_id")
+    title: str
+    slug: str
+    excerpt: str
+    cover_image: Optional[str] = None
+    author_id: str
+    category: str
+    tags: List[str] = []
+    published_at: datetime
+    score: float
+    
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True
+    }
+
 class BlogComment(BaseModel):
-    id: PyObjectId = Field(default_factory=lambda: str(ObjectId()), alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     content: str
     author_id: str
     post_id: str
@@ -3,26 +3,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 from bson import ObjectId
 
-class PyObjectId(str):
-    @classmethod
-    def __get_pydantic_core_schema__(cls, _source_type, _handler):
-        from pydantic_core import core_schema
-        return core_schema.union_schema([
-            core_schema.is_instance_schema(ObjectId),
-            core_schema.chain_schema([
-                core_schema.str_schema(),
-                core_schema.no_info_plain_validator_function(cls.validate)
-            ])
-        ])
-        
-    @classmethod
-    def validate(cls, v):
-        if not v or not ObjectId.is_valid(v):
-            if not v:
-                # Generate a new ObjectId if empty
-                return str(ObjectId())
-            raise ValueError("Invalid ObjectId")
-        return str(v)
+from ..utils.object_id_handler import PyObjectId
 
 class CategoryBase(BaseModel):
     name: str
@@ -38,7 +19,7 @@ class CategoryUpdate(BaseModel):
     description: Optional[str] = None
 
 class CategoryInDB(CategoryBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -3,26 +3,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field
 from bson import ObjectId
 
-class PyObjectId(str):
-    @classmethod
-    def __get_pydantic_core_schema__(cls, _source_type, _handler):
-        from pydantic_core import core_schema
-        return core_schema.union_schema([
-            core_schema.is_instance_schema(ObjectId),
-            core_schema.chain_schema([
-                core_schema.str_schema(),
-                core_schema.no_info_plain_validator_function(cls.validate)
-            ])
-        ])
-        
-    @classmethod
-    def validate(cls, v):
-        if not v or not ObjectId.is_valid(v):
-            if not v:
-                # Generate a new ObjectId if empty
-                return str(ObjectId())
-            raise ValueError("Invalid ObjectId")
-        return str(v)
+from ..utils.object_id_handler import PyObjectId
 
 class CommentBase(BaseModel):
     content: str
@@ -38,10 +19,13 @@ class CommentUpdate(BaseModel):
     content: Optional[str] = None
 
 class CommentInDB(CommentBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     likes: int = 0
+    # Chemin matérialisé : IDs des commentaires ancêtres, du premier niveau au parent direct
+    ancestors: List[str] = []
+    reply_count: int = 0
     
     class Config:
         validate_by_name = True
@@ -57,7 +41,9 @@ class CommentInDB(CommentBase):
                 "parent_id": None,
                 "created_at": "2023-01-01T00:00:00",
                 "updated_at": "2023-01-01T00:00:00",
-                "likes": 0
+                "likes": 0,
+                "ancestors": [],
+                "reply_count": 0
             }
         }
 
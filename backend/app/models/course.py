@@ -3,9 +3,15 @@ from typing import Optional, List, Any
 from pydantic import BaseModel, Field, GetJsonSchemaHandler
 from pydantic.json_schema import JsonSchemaValue
 from bson import ObjectId
-from .course_category import PyObjectId, generate_slug
+from ..utils.object_id_handler import PyObjectId
+from .course_category import generate_slug
+
+def generate_item_id() -> str:
+    """Identifiant stable d'un module ou d'une leçon (ObjectId au format texte)"""
+    return str(ObjectId())
 
 class Lesson(BaseModel):
+    id: str = Field(default_factory=generate_item_id)
     title: str
     description: Optional[str] = None
     content: str
@@ -20,7 +26,18 @@ class Lesson(BaseModel):
     class Config:
         json_encoders = {ObjectId: str}
 
+class LessonUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    content: Optional[str] = None
+    duration: Optional[int] = None
+    type: Optional[str] = None
+    order: Optional[int] = None
+    video_url: Optional[str] = None
+    is_active: Optional[bool] = None
+
 class Module(BaseModel):
+    id: str = Field(default_factory=generate_item_id)
     title: str
     description: Optional[str] = None
     order: int
@@ -32,6 +49,14 @@ class Module(BaseModel):
     class Config:
         json_encoders = {ObjectId: str}
 
+class ModuleUpdate(BaseModel):
+    # Les leçons ne sont modifiées que par les routes des leçons,
+    # qui conservent leurs identifiants
+    title: Optional[str] = None
+    description: Optional[str] = None
+    order: Optional[int] = None
+    is_active: Optional[bool] = None
+
 class CourseBase(BaseModel):
     title: str
     description: str
@@ -77,9 +102,10 @@ class CourseUpdate(BaseModel):
     modules: Optional[List[Module]] = None
 
 class CourseInDB(CourseBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     slug: str
     modules: List[Module] = []
+    total_lessons: int = 0
     enrolled_students: int = 0
     rating: float = 0.0
     total_ratings: int = 0
@@ -111,4 +137,28 @@ class CourseInDB(CourseBase):
                 "created_at": "2024-01-15T10:00:00",
                 "updated_at": "2024-01-15T10:00:00"
             }
-        } 
\ No newline at end of file
+        } 
+
+class CourseSummary(CourseBase):
+    """
+    Version allégée d'une formation pour les listes : sans l'arborescence
+    des modules et leçons, avec les compteurs calculés côté MongoDB.
+    """
+    id: PyObjectId = Field(alias="_id")
+    slug: str
+    module_count: int = 0
+    lesson_count: int = 0
+    enrolled_students: int = 0
+    rating: float = 0.0
+    total_ratings: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        allow_population_by_field_name = True
+        arbitrary_types_allowed = True
+        json_encoders = {ObjectId: str}
+
+class CourseSearchResult(CourseSummary):
+    """Formation trouvée par la recherche, avec son score de pertinence"""
+    score: float
@@ -1,36 +1,22 @@
 from datetime import datetime
 from typing import Optional, Any
-from pydantic import BaseModel, Field, GetJsonSchemaHandler
-from pydantic.json_schema import JsonSchemaValue
+from pydantic import BaseModel, Field
 from bson import ObjectId
 import re
 import unicodedata
 
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+from ..utils.object_id_handler import PyObjectId
 
-    @classmethod
-    def validate(cls, v, handler):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __get_pydantic_json_schema__(
-        cls,
-        _core_schema: Any,
-        _handler: GetJsonSchemaHandler
-    ) -> JsonSchemaValue:
-        return {"type": "string"}
-
-def generate_slug(text: str) -> str:
-    """Génère un slug à partir d'un texte"""
+def normalize_text(text: str) -> str:
+    """Normalise un texte pour la comparaison : sans accents et en minuscules"""
     # Normaliser le texte (enlever les accents)
     text = unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
     # Convertir en minuscules
-    text = text.lower()
+    return text.lower()
+
+def generate_slug(text: str) -> str:
+    """Génère un slug à partir d'un texte"""
+    text = normalize_text(text)
     # Remplacer les espaces et caractères spéciaux par des tirets
     text = re.sub(r'[^a-z0-9]+', '-', text)
     # Enlever les tirets au début et à la fin
@@ -57,7 +43,7 @@ class CourseCategoryUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 class CourseCategoryInDB(CourseCategoryBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     slug: str
     course_count: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
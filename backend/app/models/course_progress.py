@@ -38,7 +38,7 @@ class UserCourseProgressUpdate(BaseModel):
         }
 
 class UserCourseProgressInDB(UserCourseProgressBase):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
 
     class Config:
         allow_population_by_field_name = True
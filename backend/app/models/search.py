@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+class Suggestion(BaseModel):
+    """Suggestion de la barre de navigation"""
+    type: str  # course, course_category, blog_post
+    id: str
+    title: str
+    slug: str
@@ -3,7 +3,6 @@ from typing import Optional, Any, Literal
 from pydantic import BaseModel, Field, EmailStr
 from bson import ObjectId
 
-# Importer la nouvelle implémentation de PyObjectId
 from ..utils.object_id_handler import PyObjectId
 
 class UserBase(BaseModel):
@@ -17,7 +16,7 @@ class UserCreate(UserBase):
     password: str
 
 class UserInDB(UserBase):
-    id: PyObjectId = Field(alias="_id")
+    id: PyObjectId = Field(default_factory=ObjectId, alias="_id")
     hashed_password: str
     created_at: datetime = datetime.utcnow()
     updated_at: datetime = datetime.utcnow()
@@ -36,9 +35,6 @@ class UserInDB(UserBase):
                 "created_at": "2023-01-01T00:00:00",
                 "updated_at": "2023-01-01T00:00:00"
             }
-        },
-        "json_encoders": {
-            PyObjectId: str
         }
     }
 
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from typing import Optional
 
+from ..utils.object_id_handler import PyObjectId
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -8,3 +10,13 @@ class Token(BaseModel):
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
     is_admin: bool = False
+
+class Principal(BaseModel):
+    """Identité minimale d'un utilisateur, construite à partir du token."""
+    id: PyObjectId
+    is_admin: bool = False
+    
+    model_config = {
+        "arbitrary_types_allowed": True
+    }
+
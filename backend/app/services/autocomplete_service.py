@@ -0,0 +1,192 @@
+"""
+Suggestions de la barre de navigation (autocomplétion).
+
+Les titres et slugs des formations actives, des catégories de formations
+actives et des articles sont normalisés comme les slugs (sans accents, en
+minuscules) et rangés dans un tableau trié : une recherche par préfixe est une
+recherche dichotomique (bisect) suivie d'un parcours des clés voisines, sans
+requête MongoDB. Chaque mot du titre est aussi un point d'entrée, pour que
+"avance" suggère "Python avancé".
+
+L'index est construit au démarrage puis mis à jour par les routes d'écriture.
+Chaque mise à jour incrémente un numéro de version partagé dans MongoDB
+(collection sync_versions) ; les autres workers le comparent périodiquement
+à leur version locale et reconstruisent leur index s'il a changé.
+"""
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from ..db.database import get_database
+from ..models.course_category import normalize_text
+
+# Types de suggestions
+COURSE = "course"
+COURSE_CATEGORY = "course_category"
+BLOG_POST = "blog_post"
+
+VERSION_ID = "autocomplete"
+
+# Nombre maximum de clés examinées par recherche
+_MAX_SCANNED_KEYS = 200
+
+Entry = Tuple[str, str, str]  # (clé normalisée, type, id)
+
+class AutocompleteIndex:
+    """Index de préfixes en mémoire, propre à chaque worker."""
+    def __init__(self):
+        self._keys: List[Entry] = []
+        self._items: Dict[Tuple[str, str], Dict[str, str]] = {}
+        self._item_keys: Dict[Tuple[str, str], List[str]] = {}
+        self._titles: Dict[Tuple[str, str], str] = {}
+        self.version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _add_item(self, kind: str, item_id: str, title: str, slug: str) -> List[str]:
+        """Enregistre l'élément et retourne ses clés (suffixes du titre à chaque mot, slug)."""
+        normalized = " ".join(normalize_text(title).split())
+        words = normalized.split(" ")
+        keys = {" ".join(words[i:]) for i in range(len(words))}
+        if slug:
+            keys.add(slug)
+        keys.discard("")
+        keys = sorted(keys)
+        self._items[(kind, item_id)] = {"type": kind, "id": item_id, "title": title, "slug": slug}
+        self._item_keys[(kind, item_id)] = keys
+        self._titles[(kind, item_id)] = normalized
+        return keys
+
+    def upsert(self, kind: str, item_id: str, title: str, slug: str) -> None:
+        self.remove(kind, item_id)
+        for key in self._add_item(kind, item_id, title, slug):
+            insort(self._keys, (key, kind, item_id))
+
+    def remove(self, kind: str, item_id: str) -> None:
+        keys = self._item_keys.pop((kind, item_id), None)
+        if keys is None:
+            return
+        del self._items[(kind, item_id)]
+        del self._titles[(kind, item_id)]
+        for key in keys:
+            entry = (key, kind, item_id)
+            position = bisect_left(self._keys, entry)
+            if position < len(self._keys) and self._keys[position] == entry:
+                del self._keys[position]
+
+    def replace(self, items: List[Tuple[str, str, str, str]], version: Optional[int]) -> None:
+        """Remplace tout le contenu de l'index (type, id, titre, slug)."""
+        keys: List[Entry] = []
+        self._items = {}
+        self._item_keys = {}
+        self._titles = {}
+        for kind, item_id, title, slug in items:
+            keys.extend((key, kind, item_id) for key in self._add_item(kind, item_id, title, slug))
+        keys.sort()
+        self._keys = keys
+        self.version = version
+
+    def suggest(self, prefix: str, limit: int = 8, kinds: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """
+        Éléments dont le titre (ou un de ses mots) ou le slug commence par le
+        préfixe ; ceux dont le titre commence par le préfixe, puis les plus
+        courts, d'abord.
+        """
+        prefix = " ".join(normalize_text(prefix).split())
+        if not prefix:
+            return []
+        matches: Dict[Tuple[str, str], str] = {}
+        position = bisect_left(self._keys, (prefix,))
+        end = min(position + _MAX_SCANNED_KEYS, len(self._keys))
+        while position < end:
+            key, kind, item_id = self._keys[position]
+            if not key.startswith(prefix):
+                break
+            if kinds is None or kind in kinds:
+                matches[(kind, item_id)] = self._titles[(kind, item_id)]
+            position += 1
+        ranked = sorted(
+            matches.items(),
+            key=lambda match: (not match[1].startswith(prefix), len(match[1]), match[1])
+        )
+        return [self._items[item_key] for item_key, _ in ranked[:limit]]
+
+autocomplete_index = AutocompleteIndex()
+
+def _course_item(course: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    return COURSE, str(course["_id"]), course.get("title") or "", course.get("slug") or ""
+
+def _category_item(category: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    return COURSE_CATEGORY, str(category["_id"]), category.get("name") or "", category.get("slug") or ""
+
+def _post_item(post: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    return BLOG_POST, str(post["_id"]), post.get("title") or "", post.get("slug") or ""
+
+async def _read_version(db) -> int:
+    state = await db.sync_versions.find_one({"_id": VERSION_ID})
+    return state["version"] if state else 0
+
+async def build_autocomplete_index() -> int:
+    """
+    Construit l'index à partir de la base. Retourne le nombre d'éléments indexés.
+    La version est lue avant les documents : une écriture concurrente provoquera
+    au pire une reconstruction de plus.
+    """
+    db = await get_database()
+    version = await _read_version(db)
+    active = {"is_active": {"$ne": False}}
+    items = []
+    async for course in db.courses.find(active, {"title": 1, "slug": 1}):
+        items.append(_course_item(course))
+    async for category in db.course_categories.find(active, {"name": 1, "slug": 1}):
+        items.append(_category_item(category))
+    async for post in db.blog_posts.find({}, {"title": 1, "slug": 1}):
+        items.append(_post_item(post))
+    autocomplete_index.replace(items, version)
+    return len(items)
+
+async def sync_autocomplete_index() -> None:
+    """Reconstruit l'index si un autre worker a modifié les données indexées."""
+    db = await get_database()
+    if await _read_version(db) != autocomplete_index.version:
+        count = await build_autocomplete_index()
+        print(f"Index d'autocomplétion reconstruit ({count} éléments)")
+
+async def _notify_change() -> None:
+    db = await get_database()
+    state = await db.sync_versions.find_one_and_update(
+        {"_id": VERSION_ID},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    # Si d'autres workers ont écrit entre-temps, la version locale reste en
+    # retard et la prochaine synchronisation reconstruira l'index
+    if autocomplete_index.version is not None and state["version"] == autocomplete_index.version + 1:
+        autocomplete_index.version = state["version"]
+
+async def _upsert(item: Tuple[str, str, str, str], active: bool) -> None:
+    kind, item_id, title, slug = item
+    if active:
+        autocomplete_index.upsert(kind, item_id, title, slug)
+    else:
+        autocomplete_index.remove(kind, item_id)
+    await _notify_change()
+
+async def index_course(course: Dict[str, Any]) -> None:
+    await _upsert(_course_item(course), course.get("is_active", True) is not False)
+
+async def index_course_category(category: Dict[str, Any]) -> None:
+    await _upsert(_category_item(category), category.get("is_active", True) is not False)
+
+async def index_blog_post(post: Dict[str, Any]) -> None:
+    await _upsert(_post_item(post), True)
+
+async def unindex(kind: str, item_id: str) -> None:
+    autocomplete_index.remove(kind, str(item_id))
+    await _notify_change()
+
+def suggest(prefix: str, limit: int = 8, kinds: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    return autocomplete_index.suggest(prefix, limit, kinds)
@@ -1,65 +1,73 @@
 from bson import ObjectId
-from typing import List, Optional, Dict, Any
+from pymongo import UpdateOne
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
+from ..core.pagination import fetch_page
+from ..core.response_cache import invalidate_cache_tags
+from ..core.responses import model_projection
 from ..db.database import get_database
 from ..models.blog import BlogPostCreate, BlogPostInDB, BlogPostUpdate, BlogPostWithAuthor
-from ..services.user_service import get_user_by_id
-from ..services.upload_service import delete_unused_images, extract_image_urls_from_content, delete_file
+from ..services.autocomplete_service import BLOG_POST, index_blog_post, unindex
+from ..services.user_service import get_authors_by_ids
+from ..services.upload_service import (
+    IMAGE_REFS_VERSION,
+    acquire_uploads,
+    has_image_refs,
+    image_refs_fields,
+    post_image_urls,
+    release_uploads,
+)
 
-async def get_all_blog_posts(skip: int = 0, limit: int = 10, category: str = None) -> List[BlogPostWithAuthor]:
+# Champs lus pour les articles renvoyés par les routes de lecture
+BLOG_POST_PROJECTION = model_projection(BlogPostWithAuthor)
+
+async def attach_authors(posts: List[Dict[str, Any]], as_document: bool = False) -> List[Any]:
+    """
+    Associe leur auteur à une liste d'articles bruts issus de MongoDB.
+    Tous les auteurs de la page sont récupérés en une seule requête.
+    Avec as_document, les articles sont renvoyés en dictionnaires, sans validation.
+    """
+    authors = await get_authors_by_ids(post.get("author_id") for post in posts)
+
+    posts_with_author = []
+    for post in posts:
+        post_with_author = {**post, "author": authors.get(post.get("author_id"))}
+        posts_with_author.append(post_with_author if as_document else BlogPostWithAuthor(**post_with_author))
+    return posts_with_author
+
+async def get_all_blog_posts(
+    skip: int = 0,
+    limit: int = 10,
+    category: str = None,
+    cursor: Optional[str] = None,
+    as_document: bool = False
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Retourne une page d'articles, du plus récent au plus ancien,
+    et le curseur de la page suivante.
+    """
     db = await get_database()
     query = {}
     if category:
         query["category"] = category
-        
-    cursor = db.blog_posts.find(query).sort("published_at", -1).skip(skip).limit(limit)
-    posts = []
     
-    async for post in cursor:
-        # Convertir l'ObjectId en string
-        post["_id"] = str(post["_id"])
-        
-        # Récupérer l'auteur
-        author = await get_user_by_id(post["author_id"])
-        author_dict = None
-        if author:
-            author_dict = {
-                "id": str(author.id),
-                "full_name": author.full_name,
-                "email": author.email,
-                "role": author.role
-            }
-        
-        # Créer un post avec l'auteur
-        post_with_author = {**post, "author": author_dict}
-        posts.append(BlogPostWithAuthor(**post_with_author))
+    posts, next_cursor = await fetch_page(
+        db.blog_posts, query, limit, cursor,
+        sort_field="published_at", descending=True, skip=skip,
+        projection=BLOG_POST_PROJECTION
+    )
     
-    return posts
+    return await attach_authors(posts, as_document), next_cursor
 
-async def get_blog_post_by_slug(slug: str) -> Optional[BlogPostWithAuthor]:
+async def get_blog_post_by_slug(slug: str, as_document: bool = False) -> Optional[Any]:
     db = await get_database()
-    post = await db.blog_posts.find_one({"slug": slug})
+    post = await db.blog_posts.find_one({"slug": slug}, BLOG_POST_PROJECTION)
     
     if not post:
         return None
     
-    # Convertir l'ObjectId en string
-    post["_id"] = str(post["_id"])
-    
-    # Récupérer l'auteur
-    author = await get_user_by_id(post["author_id"])
-    author_dict = None
-    if author:
-        author_dict = {
-            "id": str(author.id),
-            "full_name": author.full_name,
-            "email": author.email,
-            "role": author.role
-        }
-    
-    # Créer un post avec l'auteur
-    post_with_author = {**post, "author": author_dict}
-    return BlogPostWithAuthor(**post_with_author)
+    posts = await attach_authors([post], as_document)
+    return posts[0]
 
 async def create_blog_post(post: BlogPostCreate) -> BlogPostInDB:
     db = await get_database()
@@ -73,51 +81,58 @@ async def create_blog_post(post: BlogPostCreate) -> BlogPostInDB:
     
     # Insérer le post dans la base de données
     post_dict = post_in_db.model_dump(by_alias=True)
-    # Convertir l'id string en ObjectId pour MongoDB
-    if "_id" in post_dict and isinstance(post_dict["_id"], str):
-        post_dict["_id"] = ObjectId(post_dict["_id"])
-        
+    # Images du contenu, conservées avec l'article pour ne pas réanalyser le contenu
+    post_dict.update(image_refs_fields(post_dict.get("content")))
     result = await db.blog_posts.insert_one(post_dict)
+    await acquire_uploads(post_image_urls(post_dict))
+    await invalidate_cache_tags("blog")
     
     # Récupérer le post créé
     created_post = await db.blog_posts.find_one({"_id": result.inserted_id})
-    created_post["_id"] = str(created_post["_id"])
-    
+    await index_blog_post(created_post)
     return BlogPostInDB(**created_post)
 
+async def _find_post_without_content(db, slug: str) -> Optional[Dict[str, Any]]:
+    """
+    Lit un article sans son contenu : les références d'images enregistrées
+    dans image_refs évitent de relire et d'analyser l'ancien contenu.
+    """
+    post = await db.blog_posts.find_one({"slug": slug}, {"content": 0})
+    if post and not has_image_refs(post):
+        # Article antérieur aux références enregistrées ou à leur format actuel
+        post = await db.blog_posts.find_one({"_id": post["_id"]})
+    return post
+
 async def update_blog_post(slug: str, post_update: BlogPostUpdate) -> Optional[BlogPostInDB]:
     db = await get_database()
     
     # Vérifier si le post existe
-    existing_post = await db.blog_posts.find_one({"slug": slug})
+    existing_post = await _find_post_without_content(db, slug)
     if not existing_post:
         return None
     
     # Préparer les données à mettre à jour
     update_data = post_update.model_dump(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
-    
-    # Si le contenu a été modifié, supprimer les images qui ne sont plus utilisées
     if "content" in update_data:
-        old_content = existing_post.get("content", "")
-        new_content = update_data["content"]
-        deleted_images = await delete_unused_images(old_content, new_content)
-        if deleted_images:
-            print(f"Images supprimées lors de la mise à jour de l'article {slug}: {deleted_images}")
-    
-    # Si l'image de couverture a été modifiée, supprimer l'ancienne image
-    if "cover_image" in update_data and existing_post.get("cover_image") != update_data["cover_image"]:
-        old_cover_image = existing_post.get("cover_image")
-        if old_cover_image and old_cover_image.startswith("/static/uploads/"):
-            success = await delete_file(old_cover_image)
-            if success:
-                print(f"Image de couverture supprimée: {old_cover_image}")
+        update_data.update(image_refs_fields(update_data["content"]))
     
     # Mettre à jour le post
     await db.blog_posts.update_one(
         {"slug": slug},
         {"$set": update_data}
     )
+    await invalidate_cache_tags("blog")
+    
+    # Mettre à jour les références des images ajoutées ou retirées ; les fichiers
+    # qui ne sont plus utilisés sont supprimés en tâche de fond
+    if "content" in update_data or "cover_image" in update_data:
+        old_urls = post_image_urls(existing_post)
+        new_urls = post_image_urls({**existing_post, **update_data})
+        await acquire_uploads(new_urls - old_urls)
+        unused_images = await release_uploads(old_urls - new_urls)
+        if unused_images:
+            print(f"Images qui ne sont plus utilisées après la mise à jour de l'article {slug}: {unused_images}")
     
     # Vérifier si la mise à jour a réussi
     if "slug" in update_data and update_data["slug"] != slug:
@@ -129,16 +144,15 @@ async def update_blog_post(slug: str, post_update: BlogPostUpdate) -> Optional[B
     if not updated_post:
         return None
     
-    # Récupérer le post mis à jour
-    updated_post["_id"] = str(updated_post["_id"])
-    
+    if "title" in update_data or "slug" in update_data:
+        await index_blog_post(updated_post)
     return BlogPostInDB(**updated_post)
 
 async def delete_blog_post(slug: str) -> bool:
     db = await get_database()
     
     # Récupérer le post avant de le supprimer pour obtenir les URLs des images
-    post = await db.blog_posts.find_one({"slug": slug})
+    post = await _find_post_without_content(db, slug)
     if not post:
         return False
     
@@ -146,20 +160,13 @@ async def delete_blog_post(slug: str) -> bool:
     result = await db.blog_posts.delete_one({"slug": slug})
     
     if result.deleted_count > 0:
-        # Supprimer l'image de couverture si elle existe
-        cover_image = post.get("cover_image")
-        if cover_image and cover_image.startswith("/static/uploads/"):
-            await delete_file(cover_image)
-            print(f"Image de couverture supprimée: {cover_image}")
-        
-        # Extraire et supprimer toutes les images du contenu
-        content = post.get("content", "")
-        image_urls = extract_image_urls_from_content(content)
-        
-        for url in image_urls:
-            success = await delete_file(url)
-            if success:
-                print(f"Image supprimée du contenu: {url}")
+        await invalidate_cache_tags("blog")
+        await unindex(BLOG_POST, post["_id"])
+        # Retirer les références de l'article ; les images qu'il était le seul
+        # à utiliser sont supprimées en tâche de fond
+        unused_images = await release_uploads(post_image_urls(post))
+        if unused_images:
+            print(f"Images qui ne sont plus utilisées après la suppression de l'article {slug}: {unused_images}")
         
         return True
     
@@ -169,3 +176,20 @@ async def get_blog_categories() -> List[str]:
     db = await get_database()
     categories = await db.blog_posts.distinct("category")
     return categories
+
+
+async def ensure_post_image_refs() -> int:
+    """
+    Enregistre les références d'images (image_refs) des articles créés avant
+    l'introduction de ce champ ou de son format actuel (IMAGE_REFS_VERSION).
+    Retourne le nombre d'articles mis à jour.
+    """
+    db = await get_database()
+    requests = []
+    stale = {"image_refs_version": {"$ne": IMAGE_REFS_VERSION}}
+    async for post in db.blog_posts.find(stale, {"content": 1}):
+        requests.append(UpdateOne({"_id": post["_id"]}, {"$set": image_refs_fields(post.get("content"))}))
+    if requests:
+        await db.blog_posts.bulk_write(requests, ordered=False)
+        print(f"Références d'images enregistrées pour {len(requests)} articles")
+    return len(requests)
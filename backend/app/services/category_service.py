@@ -11,14 +11,7 @@ async def get_all_categories() -> List[CategoryInDB]:
     """Récupère toutes les catégories de la base de données."""
     db = await get_database()
     categories_raw = await db.categories.find().to_list(1000)
-    
-    # Convertir les ObjectIds en strings pour la réponse
-    categories = []
-    for cat in categories_raw:
-        cat["_id"] = str(cat["_id"])
-        categories.append(CategoryInDB(**cat))
-    
-    return categories
+    return [CategoryInDB(**cat) for cat in categories_raw]
 
 async def get_category_by_id(category_id: str) -> Optional[CategoryInDB]:
     """Récupère une catégorie par son ID."""
@@ -31,8 +24,6 @@ async def get_category_by_id(category_id: str) -> Optional[CategoryInDB]:
     if category is None:
         return None
     
-    # Convertir l'ObjectId en string pour la réponse
-    category["_id"] = str(category["_id"])
     return CategoryInDB(**category)
 
 async def get_category_by_slug(slug: str) -> Optional[CategoryInDB]:
@@ -43,8 +34,6 @@ async def get_category_by_slug(slug: str) -> Optional[CategoryInDB]:
     if category is None:
         return None
     
-    # Convertir l'ObjectId en string pour la réponse
-    category["_id"] = str(category["_id"])
     return CategoryInDB(**category)
 
 async def create_category(category: CategoryCreate) -> CategoryInDB:
@@ -70,9 +59,6 @@ async def create_category(category: CategoryCreate) -> CategoryInDB:
     # Récupérer la catégorie créée et la convertir en modèle Pydantic
     created_category_dict = await db.categories.find_one({"_id": new_category_dict["_id"]})
     
-    # Convertir l'ObjectId en string pour la réponse
-    created_category_dict["_id"] = str(created_category_dict["_id"])
-    
     return CategoryInDB(**created_category_dict)
 
 async def update_category(category_id: str, category_update: CategoryUpdate) -> Optional[CategoryInDB]:
@@ -104,8 +90,6 @@ async def update_category(category_id: str, category_update: CategoryUpdate) ->
         return_document=ReturnDocument.AFTER
     )
     
-    # Convertir l'ObjectId en string pour la réponse
-    updated_category["_id"] = str(updated_category["_id"])
     return CategoryInDB(**updated_category)
 
 async def delete_category(category_id: str) -> bool:
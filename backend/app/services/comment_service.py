@@ -1,45 +1,89 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 from bson import ObjectId
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.pagination import fetch_page
 from app.db.mongodb import get_database
 from app.models.comment import CommentCreate, CommentUpdate, CommentInDB, Comment
 
-async def get_comments_by_post_id(post_id: str) -> List[Comment]:
-    """Récupère tous les commentaires d'un article."""
+def _to_comment(comment: dict) -> Comment:
+    comment_obj = Comment(**comment)
+    comment_obj.replies = []
+    return comment_obj
+
+async def get_comments_by_post_id(
+    post_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    depth: int = 1
+) -> Tuple[List[Comment], Optional[str]]:
+    """
+    Récupère une page de commentaires de premier niveau d'un article, du plus
+    récent au plus ancien, avec leurs réponses jusqu'à `depth` niveaux.
+    Retourne les commentaires et le curseur de la page suivante.
+    """
     db = await get_database()
     
-    # Récupérer tous les commentaires de l'article
-    comments = await db.comments.find({"post_id": post_id}).to_list(1000)
-    
-    # Convertir les ObjectIds en strings pour la réponse
-    result = []
-    comments_dict = {}
-    
-    # Première passe : créer un dictionnaire de tous les commentaires
-    for comment in comments:
-        comment["_id"] = str(comment["_id"])
-        comment_obj = Comment(**comment)
-        comment_obj.replies = []
-        comments_dict[comment_obj.id] = comment_obj
-        
-    # Deuxième passe : organiser les commentaires en arborescence
-    for comment_id, comment_obj in list(comments_dict.items()):
-        if comment_obj.parent_id:
-            # C'est une réponse, l'ajouter au commentaire parent
-            if comment_obj.parent_id in comments_dict:
-                comments_dict[comment_obj.parent_id].replies.append(comment_obj)
-            # Supprimer cette réponse de la liste principale
-            if comment_obj.id in comments_dict:
-                del comments_dict[comment_obj.id]
-    
-    # Les commentaires restants sont les commentaires de premier niveau
-    for comment_id, comment_obj in comments_dict.items():
-        result.append(comment_obj)
-    
-    return result
+    comments, next_cursor = await fetch_page(
+        db.comments,
+        {"post_id": post_id, "parent_id": None},
+        limit,
+        cursor,
+        descending=True
+    )
+    result = [_to_comment(comment) for comment in comments]
+    if depth <= 0 or not result:
+        return result, next_cursor
+    
+    # Une seule requête pour les réponses de toute la page, via l'index sur ancestors.
+    # Les réponses plus profondes que `depth` ont un élément ancestors[depth].
+    # Elles sont regroupées par fil (ancestors[0], le commentaire de premier
+    # niveau) et limitées par fil : un fil très actif ne prive pas les autres.
+    comments_dict = {str(comment.id): comment for comment in result}
+    threads = await db.comments.aggregate([
+        {"$match": {
+            "ancestors": {"$in": list(comments_dict)},
+            f"ancestors.{depth}": {"$exists": False}
+        }},
+        {"$sort": {"created_at": 1, "_id": 1}},
+        # $firstN (MongoDB 5.2+) ne conserve que les premières réponses de
+        # chaque fil : la mémoire du groupe est bornée par la limite
+        {"$group": {
+            "_id": {"$arrayElemAt": ["$ancestors", 0]},
+            "replies": {"$firstN": {"input": "$$ROOT", "n": settings.COMMENTS_MAX_EMBEDDED_REPLIES}}
+        }},
+    ]).to_list(length=None)
+    
+    # Les réponses de chaque fil sont par date croissante : un parent est
+    # toujours antérieur à ses réponses et déjà présent dans le dictionnaire
+    for thread in threads:
+        for reply in thread["replies"]:
+            reply_obj = _to_comment(reply)
+            parent = comments_dict.get(reply_obj.parent_id)
+            if parent is not None:
+                parent.replies.append(reply_obj)
+                comments_dict[str(reply_obj.id)] = reply_obj
+    
+    return result, next_cursor
+
+async def get_comment_replies(
+    comment_id: str,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[Comment], Optional[str]]:
+    """
+    Récupère une page de réponses directes à un commentaire, de la plus ancienne
+    à la plus récente. Leur nombre de réponses permet au client de charger la suite.
+    """
+    if not ObjectId.is_valid(comment_id):
+        raise HTTPException(status_code=400, detail="ID de commentaire invalide")
+    
+    db = await get_database()
+    replies, next_cursor = await fetch_page(db.comments, {"parent_id": comment_id}, limit, cursor)
+    return [_to_comment(reply) for reply in replies], next_cursor
 
 async def get_comment_by_id(comment_id: str) -> Optional[CommentInDB]:
     """Récupère un commentaire par son ID."""
@@ -52,24 +96,34 @@ async def get_comment_by_id(comment_id: str) -> Optional[CommentInDB]:
     if comment is None:
         return None
     
-    # Convertir l'ObjectId en string pour la réponse
-    comment["_id"] = str(comment["_id"])
     return CommentInDB(**comment)
 
 async def create_comment(comment: CommentCreate) -> CommentInDB:
     """Crée un nouveau commentaire."""
     db = await get_database()
     
+    if not ObjectId.is_valid(comment.post_id):
+        raise HTTPException(status_code=400, detail="ID d'article invalide")
+    
     # Vérifier si l'article existe
-    post = await db.blog_posts.find_one({"_id": ObjectId(comment.post_id)})
+    post = await db.blog_posts.find_one({"_id": ObjectId(comment.post_id)}, {"_id": 1})
     if not post:
         raise HTTPException(status_code=404, detail="Article non trouvé")
     
-    # Vérifier si le commentaire parent existe (si spécifié)
+    # Vérifier si le commentaire parent existe (si spécifié) et incrémenter
+    # son nombre de réponses dans la même opération
+    ancestors = []
     if comment.parent_id:
-        parent_comment = await db.comments.find_one({"_id": ObjectId(comment.parent_id)})
+        if not ObjectId.is_valid(comment.parent_id):
+            raise HTTPException(status_code=400, detail="ID de commentaire parent invalide")
+        parent_comment = await db.comments.find_one_and_update(
+            {"_id": ObjectId(comment.parent_id), "post_id": comment.post_id},
+            {"$inc": {"reply_count": 1}},
+            projection={"ancestors": 1}
+        )
         if not parent_comment:
             raise HTTPException(status_code=404, detail="Commentaire parent non trouvé")
+        ancestors = parent_comment.get("ancestors", []) + [comment.parent_id]
     
     # Créer le nouveau commentaire
     new_comment_dict = comment.dict()
@@ -77,19 +131,15 @@ async def create_comment(comment: CommentCreate) -> CommentInDB:
         "_id": ObjectId(),
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
-        "likes": 0
+        "likes": 0,
+        "ancestors": ancestors,
+        "reply_count": 0
     })
     
     # Insérer dans la base de données
     await db.comments.insert_one(new_comment_dict)
     
-    # Récupérer le commentaire créé
-    created_comment_dict = await db.comments.find_one({"_id": new_comment_dict["_id"]})
-    
-    # Convertir l'ObjectId en string pour la réponse
-    created_comment_dict["_id"] = str(created_comment_dict["_id"])
-    
-    return CommentInDB(**created_comment_dict)
+    return CommentInDB(**new_comment_dict)
 
 async def update_comment(comment_id: str, comment_update: CommentUpdate, user_id: str) -> Optional[CommentInDB]:
     """Met à jour un commentaire existant."""
@@ -118,8 +168,6 @@ async def update_comment(comment_id: str, comment_update: CommentUpdate, user_id
         return_document=ReturnDocument.AFTER
     )
     
-    # Convertir l'ObjectId en string pour la réponse
-    updated_comment["_id"] = str(updated_comment["_id"])
     return CommentInDB(**updated_comment)
 
 async def delete_comment(comment_id: str, user_id: str, is_admin: bool = False) -> bool:
@@ -138,14 +186,57 @@ async def delete_comment(comment_id: str, user_id: str, is_admin: bool = False)
     if not is_admin and existing_comment["author_id"] != user_id:
         raise HTTPException(status_code=403, detail="Vous n'êtes pas autorisé à supprimer ce commentaire")
     
-    # Supprimer le commentaire
-    result = await db.comments.delete_one({"_id": ObjectId(comment_id)})
-    
-    # Supprimer également toutes les réponses à ce commentaire
-    await db.comments.delete_many({"parent_id": comment_id})
+    # Supprimer le commentaire et toutes ses réponses, à tous les niveaux,
+    # en une seule opération via l'index sur ancestors
+    result = await db.comments.delete_many({"$or": [
+        {"_id": ObjectId(comment_id)},
+        {"ancestors": comment_id},
+    ]})
+    
+    # Mettre à jour le nombre de réponses du parent
+    if result.deleted_count and existing_comment.get("parent_id"):
+        await db.comments.update_one(
+            {"_id": ObjectId(existing_comment["parent_id"])},
+            {"$inc": {"reply_count": -1}}
+        )
     
     return result.deleted_count > 0
 
+async def purge_orphan_comments() -> int:
+    """
+    Supprime les commentaires dont un ancêtre ou l'article n'existe plus,
+    ainsi que leurs réponses. Retourne le nombre de commentaires supprimés.
+    """
+    db = await get_database()
+    
+    # Commentaires parents référencés mais absents
+    parent_ids = await db.comments.distinct("parent_id", {"parent_id": {"$ne": None}})
+    parent_ids = [parent_id for parent_id in parent_ids if ObjectId.is_valid(parent_id)]
+    existing = set()
+    async for comment in db.comments.find({"_id": {"$in": [ObjectId(parent_id) for parent_id in parent_ids]}}, {"_id": 1}):
+        existing.add(str(comment["_id"]))
+    missing_parents = [parent_id for parent_id in parent_ids if parent_id not in existing]
+    
+    # Articles référencés mais supprimés
+    post_ids = await db.comments.distinct("post_id")
+    existing = set()
+    async for post in db.blog_posts.find(
+        {"_id": {"$in": [ObjectId(post_id) for post_id in post_ids if ObjectId.is_valid(post_id)]}},
+        {"_id": 1}
+    ):
+        existing.add(str(post["_id"]))
+    missing_posts = [post_id for post_id in post_ids if post_id not in existing]
+    
+    if not missing_parents and not missing_posts:
+        return 0
+    
+    result = await db.comments.delete_many({"$or": [
+        {"ancestors": {"$in": missing_parents}},
+        {"post_id": {"$in": missing_posts}},
+    ]})
+    print(f"{result.deleted_count} commentaires orphelins supprimés")
+    return result.deleted_count
+
 async def like_comment(comment_id: str, user_id: str) -> CommentInDB:
     """Ajoute un like à un commentaire."""
     if not ObjectId.is_valid(comment_id):
@@ -185,6 +276,59 @@ async def like_comment(comment_id: str, user_id: str) -> CommentInDB:
             return_document=ReturnDocument.AFTER
         )
     
-    # Convertir l'ObjectId en string pour la réponse
-    updated_comment["_id"] = str(updated_comment["_id"])
     return CommentInDB(**updated_comment)
+
+async def ensure_comment_ancestors() -> int:
+    """
+    Calcule le chemin des ancêtres et le nombre de réponses des commentaires
+    créés avant l'introduction de ces champs. Retourne le nombre de
+    commentaires mis à jour.
+    """
+    db = await get_database()
+    parents: Dict[str, Optional[str]] = {}
+    async for comment in db.comments.find({"ancestors": {"$exists": False}}, {"parent_id": 1}):
+        parents[str(comment["_id"])] = comment.get("parent_id")
+    if not parents:
+        return 0
+    
+    paths: Dict[str, List[str]] = {}
+    
+    async def path_of(comment_id: str) -> List[str]:
+        if comment_id in paths:
+            return paths[comment_id]
+        if comment_id in parents:
+            parent_id = parents[comment_id]
+            path = (await path_of(parent_id)) + [parent_id] if parent_id else []
+        else:
+            # Parent déjà migré, ou supprimé : son chemin est lu en base s'il existe
+            existing = None
+            if ObjectId.is_valid(comment_id):
+                existing = await db.comments.find_one({"_id": ObjectId(comment_id)}, {"ancestors": 1})
+            path = existing.get("ancestors", []) if existing else []
+        paths[comment_id] = path
+        return path
+    
+    requests = []
+    for comment_id in parents:
+        requests.append(UpdateOne(
+            {"_id": ObjectId(comment_id)},
+            {"$set": {"ancestors": await path_of(comment_id)}}
+        ))
+    await db.comments.bulk_write(requests, ordered=False)
+    
+    # Nombre de réponses directes de chaque commentaire
+    await db.comments.update_many({"reply_count": {"$exists": False}}, {"$set": {"reply_count": 0}})
+    counts = db.comments.aggregate([
+        {"$match": {"parent_id": {"$ne": None}}},
+        {"$group": {"_id": "$parent_id", "count": {"$sum": 1}}},
+    ])
+    requests = [
+        UpdateOne({"_id": ObjectId(entry["_id"])}, {"$set": {"reply_count": entry["count"]}})
+        async for entry in counts
+        if ObjectId.is_valid(entry["_id"])
+    ]
+    if requests:
+        await db.comments.bulk_write(requests, ordered=False)
+    
+    print(f"Chemin des ancêtres calculé pour {len(parents)} commentaires")
+    return len(parents)
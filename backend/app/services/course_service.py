@@ -1,55 +1,137 @@
-import uuid
+from bson import ObjectId
 from datetime import datetime
 from fastapi import HTTPException
-from typing import Optional, List
-
-async def create_lesson(module_id: str, lesson: Lesson) -> Lesson:
-    lesson_dict = lesson.dict()
-    lesson_dict["id"] = str(uuid.uuid4())
-    lesson_dict["created_at"] = datetime.utcnow()
-    lesson_dict["updated_at"] = datetime.utcnow()
-    
-    # Assurer que video_url est correctement géré
-    if "video_url" not in lesson_dict and "videoUrl" in lesson_dict:
-        lesson_dict["video_url"] = lesson_dict.pop("videoUrl")
-    
-    # Récupérer le module
-    module = await get_module(module_id)
-    if not module:
-        raise HTTPException(status_code=404, detail="Module not found")
-    
-    # Ajouter la leçon au module
-    if "lessons" not in module:
-        module["lessons"] = []
-    module["lessons"].append(lesson_dict)
-    
-    # Mettre à jour le module dans la base de données
-    await update_module(module_id, module)
-    
-    return Lesson(**lesson_dict)
-
-async def get_lesson(module_id: str, lesson_id: str) -> Optional[Lesson]:
-    module = await get_module(module_id)
-    if not module or "lessons" not in module:
+from pymongo import ReturnDocument
+from typing import Optional, List, Dict, Any
+
+from ..core.response_cache import invalidate_cache_tags
+from ..db.database import get_database
+from ..models.course import CourseSummary, Lesson, generate_item_id
+
+# Expression d'agrégation : nombre total de leçons d'un cours.
+# Le résultat est dénormalisé dans le champ total_lessons à chaque mutation.
+TOTAL_LESSONS_EXPR = {"$sum": {"$map": {
+    "input": {"$ifNull": ["$modules", []]},
+    "as": "module",
+    "in": {"$size": {"$ifNull": ["$$module.lessons", []]}}
+}}}
+
+# Projection des listes de formations : les modules ne sont pas renvoyés,
+# seuls leurs compteurs et la durée totale sont calculés par MongoDB
+_modules = {"$ifNull": ["$modules", []]}
+COURSE_SUMMARY_PROJECTION = {
+    **{field: 1 for field in CourseSummary.model_fields if field not in ("id", "module_count", "lesson_count", "duration")},
+    "module_count": {"$size": _modules},
+    "lesson_count": {"$sum": {"$map": {
+        "input": _modules,
+        "as": "module",
+        "in": {"$size": {"$ifNull": ["$$module.lessons", []]}}
+    }}},
+    "duration": {"$sum": {"$map": {
+        "input": _modules,
+        "as": "module",
+        "in": {"$sum": "$$module.lessons.duration"}
+    }}},
+}
+
+def count_lessons(modules: List[Dict[str, Any]]) -> int:
+    return sum(len(module.get("lessons") or []) for module in modules)
+
+def _course_object_id(course_id: str) -> ObjectId:
+    if not ObjectId.is_valid(course_id):
+        raise HTTPException(status_code=400, detail="ID de cours invalide")
+    return ObjectId(course_id)
+
+def _normalize_lesson(lesson: Dict[str, Any]) -> Dict[str, Any]:
+    # Assurer que video_url est présent
+    if "video_url" not in lesson and "videoUrl" in lesson:
+        lesson["video_url"] = lesson.pop("videoUrl")
+    return lesson
+
+async def get_lesson(course_id: str, lesson_id: str) -> Optional[Lesson]:
+    """
+    Récupère une seule leçon par son ID, sans charger le reste du cours
+    côté application (recherche via l'index modules.lessons.id).
+    """
+    db = await get_database()
+    lesson_filter = {"_id": _course_object_id(course_id), "modules.lessons.id": lesson_id}
+    pipeline = [
+        {"$match": lesson_filter},
+        {"$unwind": "$modules"},
+        {"$unwind": "$modules.lessons"},
+        {"$match": {"modules.lessons.id": lesson_id}},
+        {"$replaceRoot": {"newRoot": "$modules.lessons"}},
+        {"$limit": 1},
+    ]
+    lessons = await db.courses.aggregate(pipeline).to_list(length=1)
+    if not lessons:
         return None
-    
-    for lesson in module["lessons"]:
-        if lesson["id"] == lesson_id:
-            # Assurer que video_url est présent
-            if "video_url" not in lesson and "videoUrl" in lesson:
-                lesson["video_url"] = lesson.pop("videoUrl")
-            return Lesson(**lesson)
-    return None
-
-async def get_module_lessons(module_id: str) -> List[Lesson]:
-    module = await get_module(module_id)
-    if not module or "lessons" not in module:
-        return []
-    
-    lessons = []
-    for lesson in module["lessons"]:
-        # Assurer que video_url est présent
-        if "video_url" not in lesson and "videoUrl" in lesson:
-            lesson["video_url"] = lesson.pop("videoUrl")
-        lessons.append(Lesson(**lesson))
-    return lessons 
\ No newline at end of file
+    return Lesson(**_normalize_lesson(lessons[0]))
+
+async def update_lesson(course_id: str, lesson_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Met à jour les champs donnés d'une leçon identifiée par son ID.
+    Retourne le cours modifié, ou None si la leçon n'existe pas.
+    """
+    db = await get_database()
+    now = datetime.utcnow()
+
+    update_fields = {
+        f"modules.$[].lessons.$[lesson].{field}": value
+        for field, value in update_data.items()
+        if field != "id"
+    }
+    update_fields["modules.$[].lessons.$[lesson].updated_at"] = now
+    update_fields["updated_at"] = now
+
+    updated_course = await db.courses.find_one_and_update(
+        {"_id": _course_object_id(course_id), "modules.lessons.id": lesson_id},
+        {"$set": update_fields},
+        array_filters=[{"lesson.id": lesson_id}],
+        return_document=ReturnDocument.AFTER
+    )
+    if updated_course:
+        await invalidate_cache_tags("courses")
+    return updated_course
+
+async def ensure_course_item_ids() -> int:
+    """
+    Attribue un identifiant stable aux modules et leçons créés avant
+    l'introduction des IDs. Retourne le nombre de cours mis à jour.
+    """
+    db = await get_database()
+    cursor = db.courses.find(
+        {"$or": [
+            {"modules": {"$elemMatch": {"id": {"$exists": False}}}},
+            {"modules.lessons": {"$elemMatch": {"id": {"$exists": False}}}},
+        ]},
+        {"modules": 1}
+    )
+
+    updated = 0
+    async for course in cursor:
+        modules = course.get("modules", [])
+        for module in modules:
+            module.setdefault("id", generate_item_id())
+            for lesson in module.get("lessons", []):
+                lesson.setdefault("id", generate_item_id())
+        await db.courses.update_one({"_id": course["_id"]}, {"$set": {"modules": modules}})
+        updated += 1
+
+    if updated:
+        print(f"Identifiants ajoutés aux modules et leçons de {updated} cours")
+    return updated
+
+async def ensure_course_lesson_counts() -> int:
+    """
+    Calcule le compteur total_lessons des cours qui n'en ont pas encore.
+    Retourne le nombre de cours mis à jour.
+    """
+    db = await get_database()
+    result = await db.courses.update_many(
+        {"total_lessons": {"$exists": False}},
+        [{"$set": {"total_lessons": TOTAL_LESSONS_EXPR}}]
+    )
+    if result.modified_count:
+        print(f"Compteur de leçons calculé pour {result.modified_count} cours")
+    return result.modified_count
@@ -0,0 +1,201 @@
+"""
+Déclinaisons redimensionnées des images uploadées.
+
+Une déclinaison (largeur bornée, format WebP/AVIF/JPEG/PNG) est produite par
+Pillow à la première demande puis écrite dans IMAGE_CACHE_DIR ; les demandes
+suivantes sont servies directement depuis ce cache disque. Quand la taille
+totale du cache dépasse IMAGE_CACHE_MAX_SIZE, les déclinaisons les moins
+récemment servies sont supprimées.
+
+Pillow est une dépendance optionnelle : sans lui, l'image originale est servie.
+"""
+import asyncio
+import os
+import re
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from ..core.config import settings
+from .upload_service import UPLOAD_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+CACHE_DIR = Path(settings.IMAGE_CACHE_DIR)
+
+# Formats de sortie : format Pillow, extension et type MIME
+OUTPUT_FORMATS: Dict[str, Tuple[str, str, str]] = {
+    "avif": ("AVIF", ".avif", "image/avif"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+    "png": ("PNG", ".png", "image/png"),
+}
+
+# Types MIME des images servies dans leur format d'origine
+MEDIA_TYPES: Dict[str, str] = {
+    **{extension: media_type for _, extension, media_type in OUTPUT_FORMATS.values()},
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+}
+
+# Noms des fichiers uploadés (empreinte ou horodatage, jamais de chemin)
+_FILENAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+\.[A-Za-z0-9]+$")
+
+# Déclinaisons en cours de génération, pour ne pas produire deux fois la même
+_pending: Dict[Path, asyncio.Future] = {}
+
+# Taille totale estimée du cache, calculée au premier usage
+_cache_size: Optional[int] = None
+
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+def pillow_available() -> bool:
+    return Image is not None
+
+def supported_formats() -> List[str]:
+    """Formats de sortie que l'installation de Pillow sait écrire."""
+    if Image is None:
+        return []
+    Image.init()
+    return [name for name, (pil_format, _, _) in OUTPUT_FORMATS.items() if pil_format in Image.SAVE]
+
+def derivative_width(width: int) -> int:
+    """
+    Arrondit la largeur demandée à la plus petite largeur configurée qui la
+    contient, pour borner le nombre de déclinaisons par image.
+    """
+    widths = sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+    for candidate in widths:
+        if candidate >= width:
+            return candidate
+    return widths[-1]
+
+def negotiate_format(requested: Optional[str], accept: str) -> Optional[str]:
+    """
+    Choisit le format de sortie. Sans format explicite, le plus compact accepté
+    par le client (en-tête Accept) est retenu ; None conserve le format d'origine.
+    """
+    available = supported_formats()
+    if requested:
+        if requested not in available:
+            raise HTTPException(status_code=400, detail=f"Format non supporté: {requested}")
+        return requested
+    for candidate in ("avif", "webp"):
+        if candidate in available and f"image/{candidate}" in accept:
+            return candidate
+    return None
+
+def original_path(filename: str) -> Path:
+    if not _FILENAME_PATTERN.match(filename):
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    path = UPLOAD_DIR / filename
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Image non trouvée")
+    return path
+
+def _render(source: Path, target: Path, width: int, output_format: Optional[str]) -> None:
+    temp_path = target.with_name(f".{uuid.uuid4().hex}.part")
+    try:
+        with Image.open(source) as image:
+            if getattr(image, "is_animated", False) and output_format is None:
+                # Redimensionner une animation n'en garderait que la première image
+                shutil.copyfile(source, temp_path)
+            else:
+                pil_format = OUTPUT_FORMATS[output_format][0] if output_format else image.format
+                image = ImageOps.exif_transpose(image)
+                if image.width > width:
+                    image.thumbnail((width, image.height), Image.LANCZOS)
+                if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                    image = image.convert("RGB")
+                image.save(temp_path, pil_format, quality=settings.IMAGE_DERIVATIVE_QUALITY)
+        os.replace(temp_path, target)
+    except BaseException:
+        if temp_path.exists():
+            os.remove(temp_path)
+        raise
+
+def _scan_cache() -> List[Tuple[float, int, Path]]:
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+    return entries
+
+def _evict(max_size: int, keep: Path) -> int:
+    """
+    Supprime les déclinaisons les moins récemment servies jusqu'à repasser
+    sous 90 % de la taille maximale, sauf `keep` qui va être servie.
+    Retourne la taille restante du cache.
+    """
+    entries = sorted(_scan_cache())
+    total = sum(size for _, size, _ in entries)
+    target = int(max_size * 0.9)
+    for _, size, path in entries:
+        if total <= target:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            total -= size
+    return total
+
+async def _track_size(added: int, keep: Path) -> None:
+    global _cache_size
+    if _cache_size is None:
+        _cache_size = sum(size for _, size, _ in await asyncio.to_thread(_scan_cache))
+    else:
+        _cache_size += added
+    if _cache_size > settings.IMAGE_CACHE_MAX_SIZE:
+        # Le cache est recompté sur le disque : il peut être partagé entre plusieurs workers
+        _cache_size = await asyncio.to_thread(_evict, settings.IMAGE_CACHE_MAX_SIZE, keep)
+
+async def get_derivative(filename: str, width: int, output_format: Optional[str]) -> Tuple[Path, str]:
+    """
+    Retourne le chemin de la déclinaison demandée et son type MIME,
+    en la générant si elle n'est pas encore en cache.
+    """
+    source = original_path(filename)
+    stem, extension = os.path.splitext(filename)
+    suffix = OUTPUT_FORMATS[output_format][1] if output_format else extension.lower()
+    target = CACHE_DIR / f"{stem}_w{width}{suffix}"
+    media_type = MEDIA_TYPES.get(suffix, "application/octet-stream")
+
+    try:
+        # La date de modification sert d'horodatage de dernier accès pour l'éviction
+        await asyncio.to_thread(os.utime, target)
+        return target, media_type
+    except FileNotFoundError:
+        pass
+
+    pending = _pending.get(target)
+    if pending is None:
+        pending = asyncio.get_running_loop().create_future()
+        _pending[target] = pending
+        try:
+            await asyncio.to_thread(_render, source, target, width, output_format)
+        except Exception as e:
+            print(f"Erreur lors de la génération de {target.name}: {e}")
+            error = HTTPException(status_code=422, detail="Image illisible")
+            pending.set_exception(error)
+            # Marquer l'exception comme lue si aucune autre requête n'attendait
+            pending.exception()
+            raise error
+        else:
+            pending.set_result(None)
+        finally:
+            del _pending[target]
+        await _track_size(target.stat().st_size, target)
+    else:
+        await pending
+    return target, media_type
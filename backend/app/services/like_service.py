@@ -2,76 +2,97 @@ from typing import List, Optional, Dict
 from fastapi import HTTPException
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from app.db.mongodb import get_database
-from app.models.like import LikeCreate, LikeInDB
+from app.models.like import LikeCreate, LikeInDB, PostLikeState
 
 async def toggle_post_like(post_id: str, user_id: str) -> Dict[str, int]:
     """
     Ajoute ou supprime un like sur un article.
     Retourne le nombre total de likes après l'opération.
+    
+    L'unicité (post_id, user_id) est garantie par l'index unique de post_likes
+    et le compteur de l'article est mis à jour par $inc, sans recompter les likes.
     """
     if not ObjectId.is_valid(post_id):
         raise HTTPException(status_code=400, detail="ID d'article invalide")
     
     db = await get_database()
+    like_filter = {"post_id": post_id, "user_id": user_id}
     
-    # Vérifier si l'article existe
-    post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
-    if not post:
-        raise HTTPException(status_code=404, detail="Article non trouvé")
-    
-    # Vérifier si l'utilisateur a déjà liké cet article
-    existing_like = await db.post_likes.find_one({
-        "post_id": post_id,
-        "user_id": user_id
-    })
-    
-    if existing_like:
-        # L'utilisateur a déjà liké cet article, on retire son like
-        await db.post_likes.delete_one({"_id": existing_like["_id"]})
+    # Si l'utilisateur a déjà liké cet article, on retire son like
+    result = await db.post_likes.delete_one(like_filter)
+    if result.deleted_count:
         liked = False
+        increment = -1
     else:
-        # L'utilisateur n'a pas encore liké cet article
-        new_like = {
-            "_id": ObjectId(),
-            "post_id": post_id,
-            "user_id": user_id,
-            "created_at": datetime.utcnow()
-        }
-        await db.post_likes.insert_one(new_like)
+        try:
+            await db.post_likes.insert_one({
+                "_id": ObjectId(),
+                **like_filter,
+                "created_at": datetime.utcnow()
+            })
+            increment = 1
+        except DuplicateKeyError:
+            # Like déjà enregistré par une requête concurrente du même utilisateur
+            increment = 0
         liked = True
     
-    # Compter le nombre total de likes pour cet article
-    total_likes = await db.post_likes.count_documents({"post_id": post_id})
-    
     # Mettre à jour le compteur de likes dans l'article
-    await db.blog_posts.update_one(
+    post = await db.blog_posts.find_one_and_update(
         {"_id": ObjectId(post_id)},
-        {"$set": {"likes_count": total_likes}}
+        {"$inc": {"likes_count": increment}},
+        projection={"likes_count": 1},
+        return_document=ReturnDocument.AFTER
     )
+    if not post:
+        # L'article n'existe pas : annuler le like qui vient d'être ajouté
+        if increment > 0:
+            await db.post_likes.delete_one(like_filter)
+        raise HTTPException(status_code=404, detail="Article non trouvé")
     
     return {
-        "likes_count": total_likes,
+        "likes_count": max(post.get("likes_count", 0), 0),
         "liked_by_user": liked
     }
 
 async def get_post_likes_count(post_id: str) -> int:
-    """Récupère le nombre de likes d'un article."""
+    """Récupère le nombre de likes d'un article (compteur dénormalisé)."""
     if not ObjectId.is_valid(post_id):
         raise HTTPException(status_code=400, detail="ID d'article invalide")
     
     db = await get_database()
     
-    # Vérifier si l'article existe
-    post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
+    post = await db.blog_posts.find_one({"_id": ObjectId(post_id)}, {"likes_count": 1})
     if not post:
         raise HTTPException(status_code=404, detail="Article non trouvé")
     
-    # Compter le nombre de likes
-    likes_count = await db.post_likes.count_documents({"post_id": post_id})
+    return max(post.get("likes_count", 0), 0)
+
+async def reconcile_post_likes_counts() -> int:
+    """
+    Recalcule les compteurs de likes à partir de post_likes et corrige ceux
+    qui ont dérivé (opération interrompue, suppression manuelle...).
+    Retourne le nombre d'articles corrigés.
+    """
+    db = await get_database()
+    
+    counts = {}
+    async for entry in db.post_likes.aggregate([{"$group": {"_id": "$post_id", "count": {"$sum": 1}}}]):
+        counts[entry["_id"]] = entry["count"]
+    
+    updates = []
+    async for post in db.blog_posts.find({}, {"likes_count": 1}):
+        expected = counts.get(str(post["_id"]), 0)
+        if post.get("likes_count", 0) != expected:
+            updates.append(UpdateOne({"_id": post["_id"]}, {"$set": {"likes_count": expected}}))
     
-    return likes_count
+    if updates:
+        await db.blog_posts.bulk_write(updates, ordered=False)
+        print(f"Compteurs de likes corrigés pour {len(updates)} articles")
+    return len(updates)
 
 async def check_user_liked_post(post_id: str, user_id: str) -> bool:
     """Vérifie si un utilisateur a liké un article."""
@@ -80,15 +101,40 @@ async def check_user_liked_post(post_id: str, user_id: str) -> bool:
     
     db = await get_database()
     
-    # Vérifier si l'article existe
-    post = await db.blog_posts.find_one({"_id": ObjectId(post_id)})
-    if not post:
-        raise HTTPException(status_code=404, detail="Article non trouvé")
-    
     # Vérifier si l'utilisateur a liké cet article
-    existing_like = await db.post_likes.find_one({
-        "post_id": post_id,
-        "user_id": user_id
-    })
+    existing_like = await db.post_likes.find_one(
+        {"post_id": post_id, "user_id": user_id},
+        {"_id": 1}
+    )
     
     return existing_like is not None
+
+async def get_posts_like_states(post_ids: List[str], user_id: Optional[str] = None) -> Dict[str, PostLikeState]:
+    """
+    Récupère le nombre de likes et l'état "liké par l'utilisateur" de plusieurs
+    articles en deux requêtes au total, quel que soit le nombre d'articles.
+    Les articles inexistants sont absents du résultat.
+    """
+    post_ids = list(dict.fromkeys(post_ids))
+    if any(not ObjectId.is_valid(post_id) for post_id in post_ids):
+        raise HTTPException(status_code=400, detail="ID d'article invalide")
+    
+    db = await get_database()
+    
+    states = {}
+    cursor = db.blog_posts.find(
+        {"_id": {"$in": [ObjectId(post_id) for post_id in post_ids]}},
+        {"likes_count": 1}
+    )
+    async for post in cursor:
+        states[str(post["_id"])] = PostLikeState(likes_count=max(post.get("likes_count", 0), 0))
+    
+    if user_id is not None and states:
+        cursor = db.post_likes.find(
+            {"post_id": {"$in": list(states)}, "user_id": user_id},
+            {"post_id": 1}
+        )
+        async for like in cursor:
+            states[like["post_id"]].liked_by_user = True
+    
+    return states
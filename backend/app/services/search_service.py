@@ -0,0 +1,79 @@
+"""
+Recherche plein texte sur les formations et les articles du blog.
+
+La recherche s'appuie sur les index texte MongoDB déclarés dans
+app.db.indexes (racinisation française, poids par champ, insensibles aux
+accents). La requête de l'utilisateur est normalisée comme les slugs
+(sans accents, en minuscules) avant d'être transmise à $text.
+
+Les résultats sont triés par pertinence (textScore) puis par _id et paginés
+par curseur sur le couple (score, _id).
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.pagination import keyset_filter, next_page
+from ..db.database import get_database
+from ..models.course_category import normalize_text
+from .course_service import COURSE_SUMMARY_PROJECTION
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Champs renvoyés pour un article trouvé (le contenu est exclu)
+POST_RESULT_PROJECTION = {
+    field: 1
+    for field in ("title", "slug", "excerpt", "cover_image", "author_id", "category", "tags", "published_at")
+}
+
+def search_text(query: str) -> str:
+    """
+    Normalise la recherche : accents retirés et minuscules, comme generate_slug.
+    Les expressions entre guillemets et les exclusions (-mot) sont conservées.
+    """
+    return " ".join(normalize_text(query).split())
+
+async def _search(
+    collection,
+    query: str,
+    match: Dict[str, Any],
+    projection: Dict[str, Any],
+    limit: int,
+    cursor: Optional[str]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    pipeline = [
+        {"$match": {"$text": {"$search": search_text(query)}, **match}},
+        {"$addFields": {"score": TEXT_SCORE}},
+    ]
+    if cursor:
+        pipeline.append({"$match": keyset_filter("score", cursor, descending=True)})
+    # Un document de plus que demandé pour savoir s'il existe une page suivante
+    pipeline += [
+        {"$sort": {"score": -1, "_id": -1}},
+        {"$limit": limit + 1},
+        {"$project": {**projection, "score": 1}},
+    ]
+    docs = await collection.aggregate(pipeline).to_list(length=limit + 1)
+    return next_page(docs, limit, sort_field="score")
+
+async def search_courses(
+    query: str,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Formations actives dont le titre, la description, les objectifs ou
+    le titre des leçons correspondent à la recherche, les plus pertinentes d'abord.
+    """
+    db = await get_database()
+    return await _search(db.courses, query, {"is_active": {"$ne": False}}, COURSE_SUMMARY_PROJECTION, limit, cursor)
+
+async def search_blog_posts(
+    query: str,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Articles dont le titre, le résumé, les tags ou le contenu correspondent
+    à la recherche, les plus pertinents d'abord.
+    """
+    db = await get_database()
+    return await _search(db.blog_posts, query, {}, POST_RESULT_PROJECTION, limit, cursor)
@@ -1,12 +1,17 @@
+import asyncio
+import hashlib
 import os
-import shutil
 import re
-from fastapi import UploadFile
-from datetime import datetime
 import uuid
+from collections import Counter
+from fastapi import UploadFile, HTTPException
+from datetime import datetime
 from pathlib import Path
-from typing import List, Set
+from pymongo import UpdateOne
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlsplit
 from ..core.config import settings
+from ..db.database import get_database
 
 # Définir le répertoire de stockage des images
 UPLOAD_DIR = Path("static/uploads")
@@ -17,99 +22,362 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # URL de base du serveur
 BASE_URL = settings.BACKEND_HOST or "http://localhost:8000"
 
+# Préfixe des URLs des fichiers uploadés
+UPLOAD_URL_PREFIX = "/static/uploads/"
+
+# Signatures (premiers octets) des formats d'image acceptés et extension associée.
+# Le SVG est exclu : il peut contenir du script exécuté par le navigateur.
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+]
+
+def sniff_image_extension(head: bytes) -> Optional[str]:
+    """
+    Détermine le format d'une image à partir de ses premiers octets
+    et retourne l'extension correspondante, ou None si le format n'est pas reconnu
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return ".avif"
+    return None
+
+def _commit_upload(temp_path: Path, file_path: Path) -> bool:
+    """
+    Place le fichier temporaire à son emplacement définitif.
+    Retourne False si un fichier de même contenu existait déjà.
+    """
+    if file_path.exists():
+        os.remove(temp_path)
+        # Un nouvel upload repousse la suppression éventuelle par le ramasse-miettes
+        os.utime(file_path)
+        return False
+    os.replace(temp_path, file_path)
+    return True
+
 async def save_upload_file(file: UploadFile) -> str:
     """
-    Sauvegarde un fichier téléchargé et retourne son URL complète
+    Sauvegarde un fichier téléchargé et retourne son URL relative.
+
+    Le fichier est lu et écrit par blocs, les écritures disque étant déléguées
+    à un thread pour ne pas bloquer la boucle d'événements. La taille est
+    vérifiée au fil de l'écriture (413 au-delà de UPLOAD_MAX_SIZE ; le corps de
+    la requête est déjà borné par BodySizeLimitMiddleware) et le format
+    est déterminé d'après les premiers octets (415 si ce n'est pas une image
+    acceptée). Le contenu est écrit dans un fichier temporaire du même
+    répertoire, renommé atomiquement une fois complet : un fichier visible
+    dans static/uploads est toujours entier.
+
+    Le fichier est nommé d'après l'empreinte SHA-256 de son contenu : une
+    image déjà présente n'est pas stockée une seconde fois et la même URL est
+    renvoyée. Les références des articles sont comptées dans upload_refs.
     """
-    # Générer un nom de fichier unique
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    unique_id = str(uuid.uuid4())[:8]
-    file_extension = os.path.splitext(file.filename)[1] if file.filename else ".jpg"
-    
-    # Créer un nom de fichier sécurisé
-    filename = f"{timestamp}_{unique_id}{file_extension}"
-    file_path = UPLOAD_DIR / filename
-    
-    # Sauvegarder le fichier
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
+    chunk_size = max(settings.UPLOAD_CHUNK_SIZE, 16)
+    first_chunk = await file.read(chunk_size)
+    extension = sniff_image_extension(first_chunk)
+    if extension is None:
+        raise HTTPException(status_code=415, detail="Format d'image non supporté")
+
+    temp_path = UPLOAD_DIR / f".{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    buffer = await asyncio.to_thread(open, temp_path, "wb")
+    try:
+        chunk = first_chunk
+        while chunk:
+            size += len(chunk)
+            if size > settings.UPLOAD_MAX_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Le fichier dépasse la taille maximale de {settings.UPLOAD_MAX_SIZE} octets"
+                )
+            digest.update(chunk)
+            await asyncio.to_thread(buffer.write, chunk)
+            chunk = await file.read(chunk_size)
+        await asyncio.to_thread(buffer.close)
+        filename = f"{digest.hexdigest()}{extension}"
+        stored = await asyncio.to_thread(_commit_upload, temp_path, UPLOAD_DIR / filename)
+    except BaseException:
+        # Ne laisser aucun fichier partiel, y compris si la requête est annulée
+        buffer.close()
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
     # Retourner l'URL relative (plus compatible avec certaines configurations)
-    relative_path = f"/static/uploads/{filename}"
-    
-    # Afficher les deux chemins pour le débogage
-    print(f"Chemin relatif: {relative_path}")
-    print(f"Chemin complet: {BASE_URL}{relative_path}")
-    
+    relative_path = f"{UPLOAD_URL_PREFIX}{filename}"
+    if stored:
+        print(f"Fichier enregistré: {relative_path} ({size} octets)")
+    else:
+        print(f"Fichier déjà présent: {relative_path}")
     return relative_path
 
 
+class ImageRef(NamedTuple):
+    """
+    Référence à un fichier uploadé dans un contenu HTML : chemin
+    /static/uploads/<fichier> et position de l'URL telle qu'elle est écrite
+    """
+    url: str
+    start: int
+    end: int
+
+
+# Version du format des références enregistrées dans image_refs ; les articles
+# enregistrés avec une version antérieure sont réanalysés au démarrage
+IMAGE_REFS_VERSION = 2
+
+# URL d'un attribut src, terminée par un guillemet
+_SRC_URL = re.compile(r'[^"\']*(?=["\'])')
+# Contexte précédant une URL dans un style background-image: url('...')
+_BACKGROUND_PREFIX = re.compile(r'background-image:\s*url\(["\']?')
+_BACKGROUND_URL = re.compile(r'[^\)"\']*')
+# Hôte et schéma d'une URL absolue (http://localhost:8000/static/uploads/...)
+_URL_HOST = re.compile(r'[^\s"\'()<>/\\]+')
+_URL_SCHEME = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:\Z')
+_MAX_HOST_LENGTH = 255
+
+
+def upload_url_path(url: str) -> Optional[str]:
+    """
+    Retourne le chemin /static/uploads/<fichier> d'une URL de fichier uploadé,
+    relative ou absolue quels que soient le schéma et l'hôte, ou None si l'URL
+    ne désigne pas un fichier uploadé. C'est la forme sous laquelle les
+    références sont comptées et comparées aux fichiers du répertoire.
+    """
+    try:
+        path = urlsplit(url).path
+    except ValueError:
+        return None
+    return path if path.startswith(UPLOAD_URL_PREFIX) else None
+
+
+def _url_start(content: str, position: int) -> int:
+    """
+    Début de l'URL dont le chemin commence à `position` : le schéma et l'hôte
+    d'une URL absolue sont inclus, une URL relative commence à `position`.
+    """
+    slashes = content.rfind("//", max(position - _MAX_HOST_LENGTH - 2, 0), position)
+    if slashes == -1 or not _URL_HOST.fullmatch(content, slashes + 2, position):
+        return position
+    scheme = _URL_SCHEME.search(content, max(slashes - 16, 0), slashes)
+    return scheme.start() if scheme else slashes
+
+
+def iter_image_refs(content: str) -> Iterator[ImageRef]:
+    """
+    Renvoie, dans l'ordre, les références aux fichiers uploadés d'un contenu
+    HTML : images des balises <img src="..."> et des styles
+    background-image: url('...'), que l'URL soit relative ou absolue.
+
+    Le contenu est parcouru une seule fois en cherchant le préfixe
+    /static/uploads/ (recherche littérale, bien plus rapide qu'une expression
+    régulière à plusieurs alternatives), puis seul le contexte de chaque
+    occurrence est vérifié, en remontant au schéma et à l'hôte éventuels.
+    """
+    find = content.find
+    position = find(UPLOAD_URL_PREFIX)
+    while position != -1:
+        start = _url_start(content, position)
+        quote = content[start - 1] if start else ""
+        if quote in ("\"", "'") and content.endswith("src=", 0, start - 1):
+            # Attribut src d'une balise <img> encore ouverte
+            tag = content.rfind("<", 0, start)
+            url = _SRC_URL.match(content, position)
+            if tag != -1 and content.startswith("<img", tag) and find(">", tag, start) == -1 and url:
+                path = upload_url_path(url.group())
+                if path:
+                    yield ImageRef(path, start, url.end())
+                position = find(UPLOAD_URL_PREFIX, url.end())
+                continue
+        background = content.rfind("background-image:", max(start - 64, 0), start)
+        if background != -1 and _BACKGROUND_PREFIX.fullmatch(content, background, start):
+            end = _BACKGROUND_URL.match(content, position).end()
+            path = upload_url_path(content[position:end])
+            if path:
+                yield ImageRef(path, start, end)
+        position = find(UPLOAD_URL_PREFIX, position + 1)
+
+
 def extract_image_urls_from_content(content: str) -> Set[str]:
     """
-    Extrait toutes les URLs d'images du contenu d'un article de blog
+    Extrait les chemins (/static/uploads/<fichier>) des images uploadées
+    du contenu d'un article de blog
     """
-    # Recherche des URLs d'images dans le contenu HTML
-    # Cela capture les images dans les balises <img src="..."> et les styles background-image: url('...')
-    img_pattern = r'<img[^>]*src=["\']([^"\']*)["\']'
-    bg_pattern = r'background-image:\s*url\(["\']?([^\)"\']*)'
-    
-    # Trouver toutes les correspondances
-    img_urls = set(re.findall(img_pattern, content))
-    bg_urls = set(re.findall(bg_pattern, content))
-    
-    # Combiner les résultats
-    all_urls = img_urls.union(bg_urls)
-    
-    # Filtrer pour ne garder que les URLs d'images uploadées (celles qui commencent par /static/uploads/)
-    uploaded_urls = {url for url in all_urls if url.startswith('/static/uploads/')}
-    
-    return uploaded_urls
+    return {ref.url for ref in iter_image_refs(content)}
+
 
+def image_refs_fields(content: Optional[str]) -> Dict[str, Any]:
+    """Champs image_refs à enregistrer avec un article pour ce contenu"""
+    return {
+        "image_refs": sorted(extract_image_urls_from_content(content or "")),
+        "image_refs_version": IMAGE_REFS_VERSION,
+    }
 
-async def delete_file(file_url: str) -> bool:
+
+def has_image_refs(post: Dict[str, Any]) -> bool:
+    """Indique si les références enregistrées de l'article sont à jour"""
+    return "image_refs" in post and post.get("image_refs_version") == IMAGE_REFS_VERSION
+
+
+def post_image_urls(post: Dict[str, Any]) -> Set[str]:
     """
-    Supprime un fichier du serveur à partir de son URL relative
+    Retourne les chemins des fichiers uploadés référencés par un article
+    (images du contenu et image de couverture, relative ou absolue). Les
+    références du contenu sont lues dans le champ image_refs s'il est à jour,
+    sans analyser le contenu.
     """
-    if not file_url or not file_url.startswith('/static/uploads/'):
-        print(f"URL invalide: {file_url}")
-        return False
-    
-    # Extraire le nom du fichier de l'URL
-    filename = file_url.split('/')[-1]
-    file_path = UPLOAD_DIR / filename
+    if has_image_refs(post):
+        urls = set(post["image_refs"])
+    else:
+        urls = extract_image_urls_from_content(post.get("content") or "")
+    cover_image = upload_url_path(post.get("cover_image") or "")
+    if cover_image:
+        urls.add(cover_image)
+    return urls
+
+
+async def acquire_uploads(urls: Iterable[str]) -> None:
+    """
+    Ajoute une référence à chacun des fichiers uploadés
+    """
+    now = datetime.utcnow()
+    requests = [
+        UpdateOne({"_id": url}, {"$inc": {"count": 1}, "$set": {"updated_at": now}}, upsert=True)
+        for url in set(urls)
+    ]
+    if requests:
+        db = await get_database()
+        await db.upload_refs.bulk_write(requests, ordered=False)
+
+
+async def release_uploads(urls: Iterable[str]) -> List[str]:
+    """
+    Retire une référence à chacun des fichiers uploadés.
+    Retourne la liste des URLs qui ne sont plus référencées par aucun article.
+    Les formations ne sont pas comptées : ces fichiers ne sont jamais supprimés
+    ici mais par collect_orphan_uploads, qui vérifie aussi les formations.
+    """
+    urls = list(set(urls))
+    if not urls:
+        return []
     
-    # Vérifier si le fichier existe
-    if not os.path.exists(file_path):
-        print(f"Fichier non trouvé: {file_path}")
-        return False
+    db = await get_database()
+    await db.upload_refs.update_many(
+        {"_id": {"$in": urls}},
+        {"$inc": {"count": -1}, "$set": {"updated_at": datetime.utcnow()}}
+    )
+    unreferenced = db.upload_refs.find({"_id": {"$in": urls}, "count": {"$lte": 0}}, {"_id": 1})
+    return [ref["_id"] async for ref in unreferenced]
+
+
+async def ensure_upload_refs(rebuild: bool = False) -> int:
+    """
+    Initialise le décompte des références à partir des articles existants
+    si la collection upload_refs est vide, ou le recalcule entièrement si
+    `rebuild` est vrai (références d'articles réanalysées, par exemple après un
+    changement de IMAGE_REFS_VERSION). Retourne le nombre de fichiers comptés.
+    """
+    db = await get_database()
+    if not rebuild and await db.upload_refs.find_one({}, {"_id": 1}):
+        return 0
     
+    counts: Counter = Counter()
+    async for post in db.blog_posts.find({}, {"content": 1, "cover_image": 1, "image_refs": 1, "image_refs_version": 1}):
+        counts.update(post_image_urls(post))
+    now = datetime.utcnow()
+    if counts:
+        await db.upload_refs.bulk_write([
+            UpdateOne({"_id": url}, {"$set": {"count": count, "updated_at": now}}, upsert=True)
+            for url, count in counts.items()
+        ], ordered=False)
+        print(f"Références d'images initialisées pour {len(counts)} fichiers")
+    if rebuild:
+        await db.upload_refs.update_many(
+            {"_id": {"$nin": list(counts)}, "count": {"$ne": 0}},
+            {"$set": {"count": 0, "updated_at": now}}
+        )
+    return len(counts)
+
+
+def course_image_urls(course: Dict[str, Any]) -> Set[str]:
+    """
+    Retourne les chemins des fichiers uploadés référencés par une formation
+    (description et contenu des leçons)
+    """
+    urls = extract_image_urls_from_content(course.get("description") or "")
+    for module in course.get("modules") or []:
+        for lesson in module.get("lessons") or []:
+            urls |= extract_image_urls_from_content(lesson.get("content") or "")
+    return urls
+
+
+def _scan_uploads() -> List[Tuple[str, float, int]]:
+    with os.scandir(UPLOAD_DIR) as it:
+        return [
+            (entry.name, entry.stat().st_mtime, entry.stat().st_size)
+            for entry in it if entry.is_file()
+        ]
+
+
+def _remove_upload(filename: str) -> bool:
     try:
-        # Supprimer le fichier
-        os.remove(file_path)
-        print(f"Fichier supprimé: {file_path}")
+        os.remove(UPLOAD_DIR / filename)
         return True
-    except Exception as e:
-        print(f"Erreur lors de la suppression du fichier {file_path}: {e}")
+    except FileNotFoundError:
         return False
 
 
-async def delete_unused_images(old_content: str, new_content: str) -> List[str]:
+async def collect_orphan_uploads() -> Dict[str, int]:
     """
-    Supprime les images qui étaient dans l'ancien contenu mais pas dans le nouveau
-    Retourne la liste des URLs des images supprimées
+    Ramasse-miettes du répertoire static/uploads (marquage puis balayage).
+
+    Les URLs référencées par les articles (contenu et image de couverture) et
+    les formations sont collectées en parcourant les documents un à un et
+    ramenées à leur chemin /static/uploads/<fichier>, qu'elles soient relatives
+    ou absolues ; les fichiers qui n'en font pas partie et dont la dernière modification est
+    antérieure à UPLOADS_GC_GRACE_PERIOD sont supprimés. Le délai de grâce
+    protège les images uploadées dans un éditeur mais pas encore enregistrées.
+    Retourne le nombre de fichiers supprimés et d'octets récupérés.
     """
-    # Extraire les URLs d'images des deux contenus
-    old_urls = extract_image_urls_from_content(old_content)
-    new_urls = extract_image_urls_from_content(new_content)
+    db = await get_database()
+    entries = await asyncio.to_thread(_scan_uploads)
     
-    # Trouver les URLs qui sont dans l'ancien contenu mais pas dans le nouveau
-    urls_to_delete = old_urls - new_urls
+    # Marquage
+    referenced: Set[str] = set()
+    current_refs = {"image_refs_version": IMAGE_REFS_VERSION, "image_refs": {"$exists": True}}
+    async for post in db.blog_posts.find(current_refs, {"image_refs": 1, "image_refs_version": 1, "cover_image": 1}):
+        referenced |= post_image_urls(post)
+    async for post in db.blog_posts.find({"$nor": [current_refs]}, {"content": 1, "cover_image": 1}):
+        referenced |= post_image_urls(post)
+    async for course in db.courses.find({}, {"description": 1, "modules.lessons.content": 1}):
+        referenced |= course_image_urls(course)
     
-    # Supprimer les fichiers correspondants
-    deleted_urls = []
-    for url in urls_to_delete:
-        success = await delete_file(url)
-        if success:
-            deleted_urls.append(url)
+    # Balayage
+    deadline = datetime.utcnow().timestamp() - settings.UPLOADS_GC_GRACE_PERIOD
+    deleted = 0
+    reclaimed = 0
+    for filename, mtime, size in entries:
+        url = f"{UPLOAD_URL_PREFIX}{filename}"
+        temporary = filename.startswith(".")
+        if mtime > deadline or url in referenced or (temporary and not filename.endswith(".part")):
+            continue
+        # Un article enregistré depuis le marquage a pu référencer le fichier
+        if not temporary and await db.upload_refs.find_one({"_id": url, "count": {"$gt": 0}}, {"_id": 1}):
+            continue
+        if await asyncio.to_thread(_remove_upload, filename):
+            deleted += 1
+            reclaimed += size
+        await db.upload_refs.delete_one({"_id": url, "count": {"$lte": 0}})
     
-    return deleted_urls
+    if deleted:
+        print(f"Ramasse-miettes des uploads: {deleted} fichiers supprimés, {reclaimed} octets récupérés")
+    return {"deleted": deleted, "reclaimed_bytes": reclaimed}
@@ -1,16 +1,25 @@
 from bson import ObjectId
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Iterable, Dict
 from ..db.database import get_database
-from ..core.security import get_password_hash, verify_password
+from ..core.cache import TTLCache
+from ..core.config import settings
+from fastapi import HTTPException
+from ..core.security import get_password_hash_async, verify_and_update_password_async
 from ..models.user import UserInDB, UserCreate
 
+# Cache des utilisateurs par ID, partagé par toutes les requêtes du processus
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+def invalidate_user_cache(user_id) -> None:
+    """À appeler après toute modification d'un document utilisateur."""
+    _user_cache.delete(str(user_id))
+
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
     db = await get_database()
     try:
         user = await db.users.find_one({"email": email})
         if user:
-            # Convertir l'ObjectId en string pour qu'il soit compatible avec PyObjectId
-            user["_id"] = str(user["_id"])
             return UserInDB(**user)
         return None
     except Exception as e:
@@ -18,18 +27,56 @@ async def get_user_by_email(email: str) -> Optional[UserInDB]:
         return None
 
 async def get_user_by_id(user_id: str) -> Optional[UserInDB]:
+    cached_user = _user_cache.get(str(user_id))
+    if cached_user is not None:
+        return cached_user
+    
     db = await get_database()
     try:
         user = await db.users.find_one({"_id": ObjectId(user_id)})
         if user:
-            # Convertir l'ObjectId en string pour qu'il soit compatible avec PyObjectId
-            user["_id"] = str(user["_id"])
-            return UserInDB(**user)
+            user_in_db = UserInDB(**user)
+            _user_cache.set(str(user_id), user_in_db)
+            return user_in_db
         return None
     except Exception as e:
         print(f"Error getting user by ID: {e}")
         return None
 
+async def get_authors_by_ids(user_ids: Iterable[str]) -> Dict[str, dict]:
+    """
+    Récupère en une seule requête les informations publiques de plusieurs auteurs.
+    Retourne un dictionnaire {id_utilisateur: auteur}.
+    """
+    object_ids = {ObjectId(user_id) for user_id in user_ids if user_id and ObjectId.is_valid(user_id)}
+    if not object_ids:
+        return {}
+
+    db = await get_database()
+    cursor = db.users.find(
+        {"_id": {"$in": list(object_ids)}},
+        {"full_name": 1, "email": 1, "role": 1}
+    )
+
+    authors = {}
+    async for user in cursor:
+        user_id = str(user["_id"])
+        authors[user_id] = {
+            "id": user_id,
+            "full_name": user.get("full_name"),
+            "email": user.get("email"),
+            "role": user.get("role", "user")
+        }
+    return authors
+
+async def get_user_updated_at(user_id: Optional[str]) -> Optional[datetime]:
+    """Date de dernière modification d'un utilisateur, sans charger le document."""
+    if not user_id or not ObjectId.is_valid(user_id):
+        return None
+    db = await get_database()
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, {"_id": 0, "updated_at": 1})
+    return user.get("updated_at") if user else None
+
 async def create_user(user: UserCreate) -> UserInDB:
     db = await get_database()
     
@@ -50,20 +97,19 @@ async def create_user(user: UserCreate) -> UserInDB:
             
         user_in_db = UserInDB(
             **user_data,
-            hashed_password=get_password_hash(user.password)
+            hashed_password=await get_password_hash_async(user.password)
         )
         
         # Insert user into database
         user_dict = user_in_db.model_dump(by_alias=True)
-        # Convertir l'id string en ObjectId pour MongoDB
-        if "_id" in user_dict and isinstance(user_dict["_id"], str):
-            user_dict["_id"] = ObjectId(user_dict["_id"])
-            
         result = await db.users.insert_one(user_dict)
         
         # Get the created user
         created_user = await get_user_by_id(str(result.inserted_id))
         return created_user
+    except HTTPException:
+        # Pool de hachage saturé : laisser remonter la 503
+        raise
     except Exception as e:
         print(f"Error creating user: {e}")
         return None
@@ -72,6 +118,14 @@ async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    is_valid, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not is_valid:
         return None
+    
+    if new_hash:
+        # Le coût bcrypt configuré a changé : mettre à jour le hash de manière transparente
+        db = await get_database()
+        await db.users.update_one({"_id": ObjectId(user.id)}, {"$set": {"hashed_password": new_hash}})
+        invalidate_user_cache(user.id)
+        user.hashed_password = new_hash
     return user
@@ -1,25 +1,34 @@
 from bson import ObjectId
-from typing import Any, Annotated
-from pydantic import BeforeValidator, PlainSerializer
+from typing import Any
+from pydantic_core import core_schema
 
-# Fonction de validation pour convertir les chaînes en ObjectId
-def validate_object_id(v: Any) -> ObjectId:
-    if isinstance(v, ObjectId):
-        return v
-    if isinstance(v, str):
-        try:
+class PyObjectId(ObjectId):
+    """
+    Type Pydantic unique pour les identifiants MongoDB, utilisé par tous les modèles.
+
+    Côté Python, les instances de bson.ObjectId sont acceptées telles quelles
+    (sans conversion ni copie) et les chaînes valides sont converties en ObjectId.
+    La valeur reste un ObjectId dans model_dump() (directement réutilisable dans
+    les requêtes MongoDB) et devient une chaîne en sérialisation JSON.
+    """
+    @classmethod
+    def validate(cls, v: Any) -> ObjectId:
+        if isinstance(v, str) and ObjectId.is_valid(v):
             return ObjectId(v)
-        except Exception:
-            raise ValueError(f"Invalid ObjectId: {v}")
-    raise ValueError(f"Value {v} cannot be converted to ObjectId")
+        raise ValueError(f"Invalid ObjectId: {v}")
 
-# Fonction de sérialisation pour convertir les ObjectId en chaînes
-def serialize_object_id(obj_id: ObjectId) -> str:
-    return str(obj_id)
+    @classmethod
+    def __get_pydantic_core_schema__(cls, _source_type: Any, _handler: Any) -> core_schema.CoreSchema:
+        from_str = core_schema.no_info_plain_validator_function(cls.validate)
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.chain_schema([core_schema.str_schema(), from_str]),
+            python_schema=core_schema.union_schema([
+                core_schema.is_instance_schema(ObjectId),
+                from_str,
+            ]),
+            serialization=core_schema.plain_serializer_function_ser_schema(str, when_used="json"),
+        )
 
-# Type annoté pour utiliser dans les modèles Pydantic
-PyObjectId = Annotated[
-    ObjectId,
-    BeforeValidator(validate_object_id),
-    PlainSerializer(serialize_object_id, return_type=str)
-]
+    @classmethod
+    def __get_pydantic_json_schema__(cls, _core_schema: Any, handler: Any) -> dict:
+        return handler(core_schema.str_schema())
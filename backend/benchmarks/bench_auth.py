@@ -0,0 +1,89 @@
+"""
+Compare le coût par requête de la résolution token -> utilisateur.
+
+    python -m benchmarks.bench_auth          # décodage seul (sans MongoDB)
+    python -m benchmarks.bench_auth --db     # chemins complets, avec MongoDB
+
+Les deux anciens chemins (core/auth.py et api/deps.py avant leur unification)
+sont reproduits ici pour servir de référence.
+"""
+import argparse
+import asyncio
+import time
+
+from bson import ObjectId
+from jose import jwt
+
+from app.core.auth import token_verifier
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.user import UserInDB
+from app.schemas.token import TokenPayload, Principal
+
+async def legacy_core_auth(db, token: str) -> UserInDB:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    user = await db.users.find_one({"_id": ObjectId(payload.get("sub"))})
+    user["_id"] = str(user["_id"])
+    return UserInDB(**user)
+
+async def legacy_deps(db, token: str) -> UserInDB:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+    user = await db.users.find_one({"_id": ObjectId(token_data.sub)})
+    user["_id"] = str(user["_id"])
+    return UserInDB(**user)
+
+async def verifier_user(db, token: str) -> UserInDB:
+    from app.services.user_service import get_user_by_id
+    token_data = token_verifier.decode(token)
+    return await get_user_by_id(token_data.sub)
+
+async def verifier_principal(db, token: str) -> Principal:
+    token_data = token_verifier.decode(token)
+    return Principal(id=token_data.sub, is_admin=token_data.is_admin)
+
+async def legacy_decode_only(db, token: str) -> TokenPayload:
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return TokenPayload(**payload)
+
+async def measure(name: str, func, db, token: str, iterations: int) -> None:
+    await func(db, token)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func(db, token)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28} {elapsed / iterations * 1e6:10.1f} µs/requête")
+
+async def main(use_db: bool, iterations: int) -> None:
+    db = None
+    user_id = ObjectId()
+    if use_db:
+        from app.db.database import connect_to_mongo, close_mongo_connection, get_database
+        await connect_to_mongo()
+        db = await get_database()
+        await db.users.insert_one({
+            "_id": user_id,
+            "email": f"bench-{user_id}@example.com",
+            "hashed_password": "x",
+            "full_name": "Bench",
+        })
+
+    token = create_access_token(str(user_id))
+    try:
+        await measure("décodage (ancien)", legacy_decode_only, db, token, iterations)
+        await measure("principal (vérificateur)", verifier_principal, db, token, iterations)
+        if use_db:
+            await measure("core/auth (ancien)", legacy_core_auth, db, token, iterations)
+            await measure("api/deps (ancien)", legacy_deps, db, token, iterations)
+            await measure("utilisateur (vérificateur)", verifier_user, db, token, iterations)
+    finally:
+        if use_db:
+            await db.users.delete_one({"_id": user_id})
+            await close_mongo_connection()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", action="store_true", help="inclure les chemins qui interrogent MongoDB")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.db, args.iterations))
@@ -0,0 +1,73 @@
+"""
+Mesure le débit de validation des modèles CourseInDB et UserInDB.
+
+    python -m benchmarks.bench_models
+    python -m benchmarks.bench_models --modules 20 --lessons 15 -n 2000
+
+Deux entrées sont comparées pour chaque modèle :
+- "ObjectId direct" : le document tel que renvoyé par MongoDB, dont les
+  ObjectId sont acceptés sans conversion par PyObjectId ;
+- "str(_id) puis validation" : l'ancien chemin des services, qui convertissait
+  `_id` en chaîne avant de construire le modèle (la chaîne est ensuite
+  reconvertie en ObjectId par la validation).
+"""
+import argparse
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.course import CourseInDB
+from app.models.user import UserInDB
+from benchmarks.bench_serialization import make_course
+
+def make_user() -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "email": "bench@example.com",
+        "full_name": "Bench",
+        "role": "user",
+        "is_active": True,
+        "is_admin": False,
+        "hashed_password": "$2b$12$" + "x" * 53,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def direct(model):
+    def run(doc):
+        return model(**doc)
+    return run
+
+def stringified(model):
+    def run(doc):
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        return model(**doc)
+    return run
+
+def measure(name: str, func, doc, iterations: int) -> None:
+    func(doc)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(doc)
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<26} {iterations / elapsed:12.0f} validations/s  ({elapsed / iterations * 1e6:8.1f} µs)")
+
+def main(modules: int, lessons: int, iterations: int) -> None:
+    for label, model, doc in [
+        (f"CourseInDB ({modules} modules x {lessons} leçons)", CourseInDB, make_course(modules, lessons)),
+        ("UserInDB", UserInDB, make_user()),
+    ]:
+        print(label)
+        measure("ObjectId direct", direct(model), doc, iterations)
+        measure("str(_id) puis validation", stringified(model), doc, iterations)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=10)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.modules, args.lessons, args.iterations)
@@ -0,0 +1,133 @@
+"""
+Compare le coût de sérialisation des réponses des routes de lecture.
+
+    python -m benchmarks.bench_serialization
+    python -m benchmarks.bench_serialization --modules 20 --lessons 15 -n 200
+
+Pour chaque route, trois chemins sont mesurés sur un document synthétique :
+- "response_model" : construction du modèle, revalidation contre le
+  response_model puis jsonable_encoder et json.dumps, comme le fait FastAPI
+  quand une route renvoie un modèle ;
+- "modèle + render_json" : construction du modèle puis sérialisation unique
+  (chemin du cache de réponses sans FAST_JSON_RESPONSES) ;
+- "document orjson" : sérialisation directe du document MongoDB
+  (FAST_JSON_RESPONSES activé).
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import dumps
+from app.models.blog import BlogPostWithAuthor
+from app.models.course import CourseInDB, CourseSummary
+
+def make_course(modules: int, lessons: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "title": "Formation de test",
+        "slug": f"formation-{ObjectId()}",
+        "description": "Description " * 20,
+        "category_id": ObjectId(),
+        "price": 49.0,
+        "level": "beginner",
+        "language": "fr",
+        "objectives": ["Objectif"] * 5,
+        "total_lessons": modules * lessons,
+        "created_at": now,
+        "updated_at": now,
+        "modules": [{
+            "id": str(ObjectId()),
+            "title": f"Module {m}",
+            "description": "Description du module",
+            "order": m,
+            "created_at": now,
+            "updated_at": now,
+            "lessons": [{
+                "id": str(ObjectId()),
+                "title": f"Leçon {l}",
+                "content": "Contenu de la leçon " * 30,
+                "duration": 10,
+                "order": l,
+                "video_url": "https://example.com/video.mp4",
+                "created_at": now,
+                "updated_at": now,
+            } for l in range(lessons)],
+        } for m in range(modules)],
+    }
+
+def make_summary(course: dict) -> dict:
+    summary = {key: value for key, value in course.items() if key != "modules"}
+    summary.update({"module_count": len(course["modules"]), "lesson_count": course["total_lessons"], "duration": 0})
+    return summary
+
+def make_post() -> dict:
+    now = datetime.utcnow()
+    return {
+        "_id": ObjectId(),
+        "title": "Article de test",
+        "slug": "article-de-test",
+        "content": "<p>Paragraphe</p>" * 300,
+        "excerpt": "Résumé",
+        "author_id": str(ObjectId()),
+        "category": "Frontend",
+        "tags": ["React", "JavaScript"],
+        "published_at": now,
+        "updated_at": now,
+        "author": {"_id": str(ObjectId()), "full_name": "Auteur", "email": "auteur@example.com"},
+    }
+
+def response_model_path(model, adapter):
+    def run(doc):
+        if isinstance(doc, list):
+            content = [model(**item) for item in doc]
+        else:
+            content = model(**doc)
+        validated = adapter.validate_python(jsonable_encoder(content))
+        return json.dumps(jsonable_encoder(validated)).encode()
+    return run
+
+def render_path(model):
+    def run(doc):
+        if isinstance(doc, list):
+            return JSONResponse(jsonable_encoder([model(**item) for item in doc])).body
+        return JSONResponse(jsonable_encoder(model(**doc))).body
+    return run
+
+def measure(name: str, func, doc, iterations: int) -> float:
+    func(doc)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(doc)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"  {name:<24} {elapsed * 1e6:10.1f} µs/réponse")
+    return elapsed
+
+def main(modules: int, lessons: int, iterations: int) -> None:
+    course = make_course(modules, lessons)
+    routes = [
+        ("GET /courses/slug/{slug}", CourseInDB, TypeAdapter(CourseInDB), course),
+        ("GET /courses/ (10 formations)", CourseSummary, TypeAdapter(list[CourseSummary]),
+         [make_summary(make_course(modules, lessons)) for _ in range(10)]),
+        ("GET /blog/{slug}", BlogPostWithAuthor, TypeAdapter(BlogPostWithAuthor), make_post()),
+    ]
+    for route, model, adapter, doc in routes:
+        print(route)
+        before = measure("response_model", response_model_path(model, adapter), doc, iterations)
+        measure("modèle + render_json", render_path(model), doc, iterations)
+        after = measure("document orjson", dumps, doc, iterations)
+        print(f"  gain: x{before / after:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", type=int, default=10)
+    parser.add_argument("--lessons", type=int, default=10)
+    parser.add_argument("-n", "--iterations", type=int, default=500)
+    args = parser.parse_args()
+    main(args.modules, args.lessons, args.iterations)